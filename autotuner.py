@@ -0,0 +1,247 @@
+"""
+Inference Autotuner for Club M Star AutoInput System
+Measures MLEngine settings on this machine and keeps the fastest in config
+"""
+
+import contextlib
+import copy
+import hashlib
+import importlib.util
+import io
+import os
+import platform
+import shutil
+import tempfile
+import time
+import numpy as np
+from typing import Dict, List, Optional
+
+# Config key of every tuned setting
+TUNED_SETTINGS = {
+    'cpu_threads': ('hardware', 'cpu_threads'),
+    'quantization': ('ml', 'quantization'),
+    'backend': ('ml', 'backend'),
+    'channels_last': ('ml', 'channels_last')
+}
+
+
+def hardware_fingerprint() -> str:
+    """Short hash of the CPU and the inference libraries installed"""
+    import torch
+    
+    cpu_name = platform.processor()
+    if os.path.exists('/proc/cpuinfo'):
+        with open('/proc/cpuinfo', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    cpu_name = line.split(':', 1)[1].strip()
+                    break
+    
+    parts = [cpu_name, platform.machine(), platform.system(), str(os.cpu_count()),
+             f"torch-{torch.__version__}"]
+    if importlib.util.find_spec('onnxruntime'):
+        from importlib.metadata import version
+        parts.append(f"onnxruntime-{version('onnxruntime')}")
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class InferenceAutotuner:
+    """Benchmarks MLEngine configurations and writes the winner into config
+    
+    The search runs in two stages to keep startup short: every backend,
+    quantization and memory format combination at the configured thread
+    count, then a thread-count sweep of the winner. Each candidate is
+    timed end to end (preprocessing included) through detect_notes_array
+    on frames of the capture size, with a scratch copy of the weights so
+    the graphs the backends export are not left in models/. The result is
+    stored under 'autotune' with the hardware fingerprint and model hash
+    it was measured for, and tune() only measures again when either of
+    them changed.
+    """
+    
+    def __init__(self, config: Dict, iterations: int = 50, warmup: int = 5):
+        """Initialize autotuner"""
+        self.config = config
+        self.iterations = iterations
+        self.warmup = warmup
+        self.frames = self._sample_frames()
+    
+    def model_hash(self) -> str:
+        """Model type, weights digest ('untrained' without a weights file) and quantization mode
+        
+        Static INT8 also depends on its calibration set, so that is part of
+        the hash too.
+        """
+        from ml_engine import MLEngine, file_digest
+        
+        engine = MLEngine(self.config)
+        path = engine.weights_path()
+        parts = [engine.model_type, file_digest(path) if os.path.exists(path) else 'untrained',
+                 engine.quantization_mode]
+        if engine.quantization_mode == 'static':
+            parts.append(self._calibration_digest())
+        return '-'.join(parts)
+    
+    def _calibration_digest(self) -> str:
+        """Hash of the calibration frame count and the name, size and mtime of every file"""
+        ml_config = self.config.get('ml', {})
+        directory = ml_config.get('calibration_dir', 'recordings')
+        digest = hashlib.sha256(str(ml_config.get('calibration_frames', 200)).encode('utf-8'))
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                stat = os.stat(os.path.join(directory, name))
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+        return digest.hexdigest()[:16]
+    
+    def is_current(self) -> bool:
+        """True if the stored result was measured for this machine and model"""
+        tuned = self.config.get('autotune', {})
+        return (tuned.get('fingerprint') == hardware_fingerprint() and
+                tuned.get('model_hash') == self.model_hash())
+    
+    def _sample_frames(self, count: int = 4) -> List[np.ndarray]:
+        """Synthetic chart frames at the configured capture size"""
+        from capture_backends import SyntheticBackend
+        
+        capture = self.config.get('capture', {})
+        synthetic = capture.get('synthetic', {})
+        backend = SyntheticBackend({'synthetic': synthetic})
+        region = {'left': 0, 'top': 0, 'width': backend.width, 'height': backend.height}
+        
+        frames = []
+        for _ in range(count):
+            frame = np.array(backend.grab(region))
+            if capture.get('pixel_format', 'bgr') == 'bgr':
+                frame = np.ascontiguousarray(frame[:, :, :3])
+            frames.append(frame)
+            backend.start_time -= 1 / 60.0
+        return frames
+    
+    def _thread_counts(self) -> List[int]:
+        """Powers of two up to the logical CPU count, plus the count itself"""
+        cpus = os.cpu_count() or 1
+        counts = {cpus}
+        threads = 1
+        while threads < cpus:
+            counts.add(threads)
+            threads *= 2
+        return sorted(counts)
+    
+    def _backends(self) -> List[str]:
+        """Backends that can run here"""
+        backends = ['eager', 'torchscript']
+        if importlib.util.find_spec('onnx') and importlib.util.find_spec('onnxruntime'):
+            backends.append('onnxruntime')
+        return backends
+    
+    def measure(self, settings: Dict) -> Optional[float]:
+        """Median per-frame detection latency in ms, None if the model failed to load"""
+        from ml_engine import MLEngine
+        
+        config = copy.deepcopy(self.config)
+        for name, value in settings.items():
+            section, key = TUNED_SETTINGS[name]
+            config.setdefault(section, {})[key] = value
+        ml_config = config.setdefault('ml', {})
+        ml_config['micro_batching'] = False
+        ml_config['inference_processes'] = 0
+        ml_config['pattern_cache_path'] = ''
+        
+        with tempfile.TemporaryDirectory() as directory:
+            # Compiled and exported graphs are cached next to the weights
+            weights = MLEngine(config).weights_path()
+            scratch = os.path.join(directory, os.path.basename(weights))
+            if os.path.exists(weights):
+                shutil.copyfile(weights, scratch)
+            ml_config['lane_model_path' if ml_config.get('model_type') == 'lane_crop'
+                      else 'model_path'] = scratch
+            
+            engine = MLEngine(config)
+            # Model loading is chatty; only the measurements are worth printing
+            with contextlib.redirect_stdout(io.StringIO()):
+                loaded = engine.load_model()
+            if not loaded or engine.backend.name != settings['backend']:
+                return None
+            return self._time(engine)
+    
+    def _time(self, engine) -> float:
+        """Median per-frame detection latency of a loaded engine in ms"""
+        for i in range(self.warmup):
+            engine.detect_notes_array(self.frames[i % len(self.frames)])
+        
+        times = []
+        for i in range(self.iterations):
+            start = time.perf_counter()
+            engine.detect_notes_array(self.frames[i % len(self.frames)])
+            times.append((time.perf_counter() - start) * 1000)
+        return float(np.median(times))
+    
+    def run(self) -> Dict:
+        """Measure every candidate and return the autotune record"""
+        threads = self.config.get('hardware', {}).get('cpu_threads', 2)
+        candidates = []
+        for backend in self._backends():
+            # ONNX Runtime always runs its own fp32 NCHW graph
+            variants = [(False, False)] if backend == 'onnxruntime' else \
+                [(quantization, channels_last) for quantization in (False, True)
+                 for channels_last in (False, True)]
+            for quantization, channels_last in variants:
+                candidates.append({'cpu_threads': threads, 'quantization': quantization,
+                                   'backend': backend, 'channels_last': channels_last})
+        
+        results = []
+        for settings in candidates:
+            results.append((self.measure(settings), settings))
+        
+        measured = [(latency, settings) for latency, settings in results if latency is not None]
+        if not measured:
+            raise RuntimeError("Hiçbir çıkarım ayarı ölçülemedi")
+        best_latency, best = min(measured, key=lambda result: result[0])
+        
+        # Thread count matters most once the rest is fixed
+        for count in self._thread_counts():
+            if count == threads:
+                continue
+            settings = dict(best, cpu_threads=count)
+            latency = self.measure(settings)
+            results.append((latency, settings))
+            if latency is not None and latency < best_latency:
+                best_latency, best = latency, settings
+        
+        return {
+            'fingerprint': hardware_fingerprint(),
+            'model_hash': self.model_hash(),
+            'settings': best,
+            'latency_ms': best_latency,
+            'candidates': len(results),
+            'tuned_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
+    def apply(self, record: Dict):
+        """Write a record and its winning settings into the config"""
+        for name, value in record['settings'].items():
+            section, key = TUNED_SETTINGS[name]
+            self.config.setdefault(section, {})[key] = value
+        self.config['autotune'] = record
+    
+    def tune(self, force: bool = False) -> Dict:
+        """Measure and apply, unless the stored result is still current"""
+        if not force and self.is_current():
+            return self.config['autotune']
+        
+        record = self.run()
+        self.apply(record)
+        return record
+
+
+if __name__ == "__main__":
+    # Test autotuner on this machine without touching config.json
+    from config_manager import ConfigManager
+    
+    tuner = InferenceAutotuner(ConfigManager().config, iterations=20)
+    print("Donanım parmak izi:", hardware_fingerprint())
+    print("Model özeti:", tuner.model_hash())
+    
+    record = tuner.run()
+    print(f"En hızlı ayarlar: {record['settings']} ({record['latency_ms']:.3f} ms/kare, "
+          f"{record['candidates']} aday)")
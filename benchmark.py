@@ -0,0 +1,825 @@
+"""
+Performance Benchmark Script
+Measures hot-path costs of Club M Star AutoInput - Ultimate Edition headlessly
+"""
+
+import sys
+import time
+import tracemalloc
+import traceback
+
+import numpy as np
+
+
+def _measure_allocations(step, frames: int) -> float:
+    """Average peak bytes allocated by step() per frame"""
+    tracemalloc.start()
+    total = 0
+    try:
+        for _ in range(frames):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            step()
+            total += tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return total / frames
+
+
+def benchmark_capture_allocations(width: int = 1920, height: int = 1080,
+                                  frames: int = 30):
+    """Bytes allocated per captured frame, copy path vs ring buffer"""
+    print("=" * 60)
+    print("BENCHMARK: Capture Allocations")
+    print("=" * 60)
+    
+    import cv2
+    from frame_buffer import FrameRingBuffer
+    
+    def grab():
+        # Stand-in for mss: every grab hands back a fresh BGRA bytearray
+        return bytearray(width * height * 4)
+    
+    def copy_path():
+        raw = grab()
+        frame = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4).copy()
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+    
+    results = {'grab': _measure_allocations(grab, frames),
+               'copy (bgr)': _measure_allocations(copy_path, frames)}
+    
+    for pixel_format in ('bgr', 'bgra'):
+        ring = FrameRingBuffer(size=3, pixel_format=pixel_format)
+        ring.write(grab(), width, height)  # warm up slot allocation
+        results[f'ring ({pixel_format})'] = _measure_allocations(
+            lambda: ring.write(grab(), width, height), frames
+        )
+    
+    print(f"Frame: {width}x{height}, {frames} frames")
+    for name, allocated in results.items():
+        extra = allocated - results['grab']
+        print(f"  - {name:<12} {allocated / 1e6:8.2f} MB/frame "
+              f"({extra / 1e6:+.2f} MB over grab)")
+    print()
+    return results
+
+
+def benchmark_roi_capture(width: int = 1920, height: int = 1080,
+                          lanes: int = 9, frames: int = 50):
+    """Capture bytes and detection cost for full frame vs hit-line ROIs"""
+    print("=" * 60)
+    print("BENCHMARK: ROI Capture")
+    print("=" * 60)
+    
+    from frame_buffer import FrameRingBuffer, build_capture_rois
+    from ml_engine import MLEngine
+    
+    engine = MLEngine({'game': {'lanes': lanes}})
+    engine.load_model()
+    
+    region = {'left': 0, 'top': 0, 'width': width, 'height': height}
+    ring = FrameRingBuffer(size=3)
+    results = {}
+    
+    for mode in ('full', 'band', 'lanes'):
+        rois = build_capture_rois(region, lanes, mode=mode)
+        grabs = [(bytearray(roi['width'] * roi['height'] * 4), roi['width'], roi['height'])
+                 for roi in rois]
+        capture_bytes = sum(len(raw) for raw, _, _ in grabs)
+        
+        start = time.perf_counter()
+        for _ in range(frames):
+            frame = ring.write_tiles(grabs)
+            engine.detect_notes(frame)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / frames
+        
+        results[mode] = {'bytes': capture_bytes, 'ms': elapsed_ms}
+    
+    full = results['full']
+    for mode, result in results.items():
+        print(f"  - {mode:<6} {result['bytes'] / 1e6:6.2f} MB/frame "
+              f"({full['bytes'] / result['bytes']:5.1f}x less), "
+              f"compose+detect {result['ms']:6.2f} ms "
+              f"({full['ms'] / result['ms']:4.1f}x faster)")
+    print()
+    return results
+
+
+def benchmark_change_gate(lanes: int = 9, frames: int = 300,
+                          static_ratio: float = 0.7):
+    """Skip ratio and detection time saved by the frame change gate"""
+    print("=" * 60)
+    print("BENCHMARK: Change Gate")
+    print("=" * 60)
+    
+    from frame_gate import FrameChangeGate
+    from ml_engine import MLEngine
+    
+    engine = MLEngine({'game': {'lanes': lanes}})
+    engine.load_model()
+    gate = FrameChangeGate(num_lanes=lanes)
+    
+    # Menu/break stretch of identical frames followed by scrolling notes
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 60, (270, 1920, 3), dtype=np.uint8)
+    lane_width = 1920 // lanes
+    for lane in range(0, lanes, 2):
+        x = lane * lane_width + lane_width // 4
+        frame[lane * 20:lane * 20 + 16, x:x + lane_width // 2] = 230
+    static_frames = int(frames * static_ratio)
+    
+    gate_ms = detect_ms = 0.0
+    for i in range(frames):
+        if i >= static_frames:
+            frame = np.roll(frame, 8, axis=0)
+        
+        start = time.perf_counter()
+        changed = gate.has_changed(frame)
+        gate_ms += (time.perf_counter() - start) * 1000
+        
+        if changed:
+            start = time.perf_counter()
+            engine.detect_notes(frame)
+            detect_ms += (time.perf_counter() - start) * 1000
+    
+    stats = gate.get_stats()
+    detections = stats['frames_checked'] - stats['frames_skipped']
+    avg_detect_ms = detect_ms / max(1, detections)
+    saved_ms = stats['frames_skipped'] * avg_detect_ms
+    
+    print(f"Frames: {frames} ({static_ratio:.0%} static)")
+    print(f"  - Skip ratio:      {stats['skip_ratio']:.2f}")
+    print(f"  - Gate cost:       {gate_ms / frames:.3f} ms/frame")
+    print(f"  - Detection cost:  {avg_detect_ms:.3f} ms/frame")
+    print(f"  - Inference saved: {saved_ms:.1f} ms total "
+          f"({saved_ms - gate_ms:.1f} ms net of gate cost)")
+    print()
+    return stats
+
+
+def benchmark_replay_throughput(width: int = 1920, height: int = 270,
+                                lanes: int = 9, frames: int = 200):
+    """Headless detection throughput and latency over a recorded clip"""
+    print("=" * 60)
+    print("BENCHMARK: Replay Throughput")
+    print("=" * 60)
+    
+    import os
+    import tempfile
+    from frame_buffer import FrameRingBuffer
+    from frame_recorder import FrameRecorder, FrameReplay
+    from ml_engine import MLEngine
+    
+    path = os.path.join(tempfile.mkdtemp(), 'benchmark.raw')
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (height, width, 4), dtype=np.uint8)
+    
+    with FrameRecorder(path) as recorder:
+        for i in range(frames):
+            recorder.write(np.roll(frame, i * 4, axis=0), width, height,
+                           timestamp=i / 60.0)
+    
+    engine = MLEngine({'game': {'lanes': lanes}})
+    engine.load_model()
+    ring = FrameRingBuffer(size=3)
+    replay = FrameReplay(path, realtime=False)
+    
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        shot = replay.grab()
+        engine.detect_notes(ring.write(shot.raw, shot.width, shot.height))
+        latencies.append((time.perf_counter() - frame_start) * 1000)
+    elapsed = time.perf_counter() - start
+    
+    replay.close()
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    
+    print(f"Clip: {frames} frames of {width}x{height} (recorded at 60 FPS)")
+    print(f"  - Throughput:  {frames / elapsed:.1f} FPS (as fast as possible)")
+    print(f"  - Latency p50: {np.percentile(latencies, 50):.2f} ms")
+    print(f"  - Latency p99: {np.percentile(latencies, 99):.2f} ms")
+    print()
+    return latencies
+
+
+def benchmark_capture_backends(frames: int = 100):
+    """Grab latency of each capture backend, side by side"""
+    print("=" * 60)
+    print("BENCHMARK: Capture Backends")
+    print("=" * 60)
+    
+    import os
+    import tempfile
+    from capture_backends import create_capture_backend
+    from frame_recorder import FrameRecorder
+    
+    region = {'left': 0, 'top': 0, 'width': 1920, 'height': 1080}
+    path = os.path.join(tempfile.mkdtemp(), 'backends.raw')
+    
+    # The synthetic run is recorded so replay serves exactly the same frames
+    synthetic = create_capture_backend({'backend': 'synthetic'})
+    with FrameRecorder(path) as recorder:
+        for _ in range(frames):
+            shot = synthetic.grab(region)
+            recorder.write(shot.raw, shot.width, shot.height)
+    
+    backends = [synthetic]
+    backends.append(create_capture_backend({'backend': 'replay', 'replay_path': path,
+                                            'replay_realtime': False}))
+    try:
+        backends.append(create_capture_backend({'backend': 'mss'}))
+    except Exception as e:
+        print(f"  (mss skipped: {e})")
+    
+    results = {}
+    for backend in backends:
+        try:
+            if backend.name != 'synthetic':
+                for _ in range(frames):
+                    backend.grab(region)
+            results[backend.name] = backend.get_stats()
+        except Exception as e:
+            print(f"  ({backend.name} skipped: {e})")
+        finally:
+            backend.close()
+    
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    
+    print(f"Region: {region['width']}x{region['height']}, {frames} grabs")
+    for name, stats in results.items():
+        print(f"  - {name:<10} avg {stats['avg_grab_ms']:7.3f} ms, "
+              f"p99 {stats['p99_grab_ms']:7.3f} ms")
+    print()
+    return results
+
+
+def benchmark_lane_brightness(width: int = 1920, height: int = 1080,
+                              lanes: int = 9, frames: int = 200):
+    """Fallback detector cost, per-lane loop vs vectorized lane_brightness"""
+    print("=" * 60)
+    print("BENCHMARK: Lane Brightness")
+    print("=" * 60)
+    
+    from lane_detection import lane_brightness
+    
+    frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    lane_width = width // lanes
+    
+    def loop():
+        return [np.mean(frame[0:height // 3, lane * lane_width:(lane + 1) * lane_width])
+                for lane in range(lanes)]
+    
+    results = {}
+    for name, detector in (('loop', loop),
+                           ('vectorized', lambda: lane_brightness(frame, lanes))):
+        start = time.perf_counter()
+        for _ in range(frames):
+            detector()
+        results[name] = (time.perf_counter() - start) * 1000 / frames
+    
+    print(f"Frame: {width}x{height}, {lanes} lanes")
+    for name, elapsed_ms in results.items():
+        print(f"  - {name:<10} {elapsed_ms:6.3f} ms/frame ({1000 / elapsed_ms:7.0f} FPS)")
+    print()
+    return results
+
+
+def benchmark_dispatch_jitter(waits: int = 200, spin_thresholds=(0.0, 0.5, 1.5)):
+    """How late waits land relative to their deadline, sleep vs hybrid spin"""
+    print("=" * 60)
+    print("BENCHMARK: Dispatch Jitter")
+    print("=" * 60)
+    
+    from precision_timer import PrecisionTimer
+    
+    # Deadlines 1-5 ms out, like key events queued a frame or two ahead
+    delays = np.random.default_rng(0).uniform(0.001, 0.005, waits)
+    
+    results = {}
+    for spin_ms in spin_thresholds:
+        timer = PrecisionTimer(spin_threshold_ms=spin_ms)
+        lateness = []
+        for delay in delays:
+            deadline = time.perf_counter() + delay
+            timer.wait_until(deadline)
+            lateness.append((time.perf_counter() - deadline) * 1000)
+        results[spin_ms] = {
+            'p50_ms': float(np.percentile(lateness, 50)),
+            'p99_ms': float(np.percentile(lateness, 99)),
+            'max_ms': float(np.max(lateness)),
+            'avg_spin_ms': timer.get_stats()['avg_spin_ms']
+        }
+    
+    print(f"Waits: {waits}, deadlines 1-5 ms ahead")
+    for spin_ms, result in results.items():
+        name = 'sleep only' if spin_ms == 0 else f'spin {spin_ms} ms'
+        print(f"  - {name:<12} late p50 {result['p50_ms']:6.3f} ms, "
+              f"p99 {result['p99_ms']:6.3f} ms, max {result['max_ms']:6.3f} ms "
+              f"(spin {result['avg_spin_ms']:.3f} ms/wait)")
+    print()
+    return results
+
+
+def benchmark_batched_inference(frames: int = 64, batch_sizes=(1, 4, 16)):
+    """Per-frame inference cost, one forward pass per frame vs batched"""
+    print("=" * 60)
+    print("BENCHMARK: Batched Inference")
+    print("=" * 60)
+    
+    from ml_engine import MLEngine
+    
+    engine = MLEngine({'ml': {'quantization': True, 'model_path': 'models/note_detector.pth'},
+                       'game': {'lanes': 9}})
+    engine.load_model()
+    clip = [np.random.default_rng(i).integers(0, 255, (270, 1920, 3), dtype=np.uint8)
+            for i in range(frames)]
+    
+    results = {}
+    start = time.perf_counter()
+    for frame in clip:
+        engine.detect_notes(frame)
+    results['single'] = (time.perf_counter() - start) * 1000 / frames
+    
+    for batch_size in batch_sizes:
+        engine.batch_size = batch_size
+        start = time.perf_counter()
+        engine.detect_notes_batch(clip)
+        results[f'batch {batch_size}'] = (time.perf_counter() - start) * 1000 / frames
+    
+    print(f"Frames: {frames} of 1920x270")
+    for name, elapsed_ms in results.items():
+        print(f"  - {name:<10} {elapsed_ms:6.3f} ms/frame ({1000 / elapsed_ms:7.0f} FPS)")
+    print()
+    return results
+
+
+def benchmark_preprocessing(width: int = 1920, height: int = 270, frames: int = 200):
+    """CNN input preprocessing, PIL round trip vs cv2 into a reused tensor"""
+    print("=" * 60)
+    print("BENCHMARK: Preprocessing")
+    print("=" * 60)
+    
+    import torch
+    from PIL import Image
+    from ml_engine import MLEngine
+    
+    engine = MLEngine({'game': {'lanes': 9}})
+    frame = np.random.default_rng(0).integers(0, 255, (height, width, 4), dtype=np.uint8)
+    
+    def pil_path():
+        # Previous _preprocess_frame
+        img = Image.fromarray(frame[:, :, :3]).resize((32, 32))
+        img_array = np.array(img).astype(np.float32) / 255.0
+        return torch.from_numpy(img_array).permute(2, 0, 1).unsqueeze(0)
+    
+    results = {}
+    for name, preprocess in (('pil', pil_path), ('cv2', lambda: engine._preprocess_frame(frame))):
+        preprocess()  # warm up buffers
+        start = time.perf_counter()
+        for _ in range(frames):
+            preprocess()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / frames
+        results[name] = (elapsed_ms, _measure_allocations(preprocess, 20))
+    
+    print(f"Frame: {width}x{height} BGRA, {frames} frames")
+    for name, (elapsed_ms, allocated) in results.items():
+        print(f"  - {name:<5} {elapsed_ms:6.3f} ms/frame, {allocated / 1024:8.1f} KiB allocated/frame")
+    
+    # The stride skips pixels: compare the input against INTER_AREA over
+    # every pixel on rendered charts, thin notes being the worst case
+    import cv2
+    from capture_backends import SyntheticBackend
+    
+    print("Input error vs full-frame INTER_AREA (0-1 scale):")
+    for frame_height in (height, 1080):
+        for note_height in (24, 4):
+            backend = SyntheticBackend({'synthetic': {'width': width, 'height': frame_height,
+                                                      'note_height': note_height}})
+            region = {'left': 0, 'top': 0, 'width': width, 'height': frame_height}
+            errors = []
+            for _ in range(20):
+                chart = np.array(backend.grab(region))
+                exact = cv2.resize(chart[:, :, :3], (32, 32), interpolation=cv2.INTER_AREA)
+                exact = exact.transpose(2, 0, 1).astype(np.float32) / 255.0
+                errors.append(np.abs(engine._preprocess_frame(chart)[0].numpy() - exact))
+                backend.start_time -= 1 / 60.0
+            errors = np.array(errors)
+            results[f"error_{frame_height}_{note_height}"] = float(errors.mean())
+            print(f"  - {width}x{frame_height}, {note_height:2d} px notes: mean {errors.mean():.4f}, "
+                  f"max {errors.max():.4f}")
+    print()
+    return results
+
+
+def benchmark_static_quantization(calibration_frames: int = 64, eval_frames: int = 64,
+                                  iterations: int = 100):
+    """Latency and agreement with fp32 of dynamic vs static INT8 models"""
+    print("=" * 60)
+    print("BENCHMARK: Static Quantization")
+    print("=" * 60)
+    
+    import torch
+    from capture_backends import SyntheticBackend
+    from ml_engine import MLEngine, NoteDetectorModel
+    
+    # Calibration and evaluation frames from the synthetic chart
+    backend = SyntheticBackend({'synthetic': {'width': 1920, 'height': 1080}})
+    region = {'left': 0, 'top': 0, 'width': 1920, 'height': 1080}
+    clip = []
+    for _ in range(calibration_frames + eval_frames):
+        clip.append(np.array(backend.grab(region)))
+        backend.start_time -= 1 / 60.0  # advance the chart one frame per grab
+    calibration, evaluation = clip[:calibration_frames], clip[calibration_frames:]
+    
+    engine = MLEngine({'game': {'lanes': 9}})
+    torch.manual_seed(0)
+    fp32 = NoteDetectorModel(num_lanes=9).eval()
+    models = {
+        'fp32': fp32,
+        'dynamic': torch.quantization.quantize_dynamic(fp32, {torch.nn.Linear},
+                                                       dtype=torch.qint8),
+        'static': engine.quantize_static(fp32, calibration)
+    }
+    
+    inputs = {}
+    for batch in (1, 16):
+        tensor = engine._input_buffer(batch)
+        for i in range(batch):
+            engine._preprocess_into(evaluation[i], i)
+        inputs[batch] = tensor.clone()
+    
+    eval_input = engine._input_buffer(len(evaluation))
+    for i, frame in enumerate(evaluation):
+        engine._preprocess_into(frame, i)
+    eval_input = eval_input.clone()
+    
+    results = {}
+    with torch.no_grad():
+        reference = fp32(eval_input)
+        for name, model in models.items():
+            latency = {}
+            for batch, tensor in inputs.items():
+                model(tensor)
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    model(tensor)
+                latency[batch] = (time.perf_counter() - start) * 1000 / iterations
+            
+            output = model(eval_input)
+            agreement = float(((torch.sigmoid(output[..., 1]) > 0.5) ==
+                               (torch.sigmoid(reference[..., 1]) > 0.5)).float().mean())
+            results[name] = {
+                'batch1_ms': latency[1],
+                'batch16_ms_per_frame': latency[16] / 16,
+                'max_abs_error': float((output - reference).abs().max()),
+                'detection_agreement': agreement
+            }
+    
+    print(f"Calibration: {calibration_frames} frames, evaluation: {eval_frames} frames")
+    for name, result in results.items():
+        print(f"  - {name:<8} batch 1 {result['batch1_ms']:6.3f} ms, "
+              f"batch 16 {result['batch16_ms_per_frame']:6.3f} ms/frame, "
+              f"max error {result['max_abs_error']:.4f}, "
+              f"agreement {result['detection_agreement']:.1%}")
+    print()
+    return results
+
+
+def benchmark_inference_backends(iterations: int = 200):
+    """Forward-pass latency of the eager, TorchScript and ONNX Runtime backends"""
+    print("=" * 60)
+    print("BENCHMARK: Inference Backends")
+    print("=" * 60)
+    
+    import os
+    import tempfile
+    import torch
+    from ml_engine import MLEngine, NoteDetectorModel
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # Same fp32 weights for every backend
+        model_path = os.path.join(directory, 'note_detector.pth')
+        torch.save(NoteDetectorModel(num_lanes=9).state_dict(), model_path)
+        
+        for name in ('eager', 'torchscript', 'onnxruntime'):
+            engine = MLEngine({'ml': {'quantization': False, 'backend': name,
+                                      'model_path': model_path},
+                               'game': {'lanes': 9}})
+            engine.load_model()
+            if engine.backend.name != name:
+                print(f"  - {name:<12} unavailable")
+                continue
+            
+            latency = {}
+            for batch in (1, 16):
+                tensor = engine._input_buffer(batch)
+                for i in range(batch):
+                    engine._preprocess_into(np.random.default_rng(i).integers(
+                        0, 255, (270, 1920, 3), dtype=np.uint8), i)
+                engine.backend.run(tensor)
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    engine.backend.run(tensor)
+                latency[batch] = (time.perf_counter() - start) * 1000 / iterations
+            results[name] = latency
+    
+    for name, latency in results.items():
+        print(f"  - {name:<12} batch 1 {latency[1]:6.3f} ms, "
+              f"batch 16 {latency[16] / 16:6.3f} ms/frame")
+    if results:
+        print(f"Fastest (batch 1): {min(results, key=lambda name: results[name][1])}")
+    print()
+    return results
+
+
+def benchmark_lane_crop_model(train_frames: int = 400, eval_frames: int = 100, epochs: int = 15):
+    """Full-frame thumbnail vs per-lane crops: accuracy after equal training, and latency"""
+    print("=" * 60)
+    print("BENCHMARK: Lane-Crop Model")
+    print("=" * 60)
+    
+    import os
+    import tempfile
+    import torch
+    from ml_engine import MLEngine
+    
+    height, width, lanes = 540, 960, 9
+    rng = np.random.default_rng(0)
+    
+    def labelled_frame():
+        # Notes of the band above the hit line, as drawn by the game
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        notes = []
+        lane_width = width // lanes
+        for lane in np.flatnonzero(rng.random(lanes) < 0.3):
+            position = rng.uniform(0.66, 0.88)
+            row = int(position * height)
+            frame[row:row + 12, lane * lane_width + 5:(lane + 1) * lane_width - 5] = 230
+            notes.append({'lane': int(lane), 'position': position})
+        return frame, notes
+    
+    training = [labelled_frame() for _ in range(train_frames)]
+    evaluation = [labelled_frame() for _ in range(eval_frames)]
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for model_type in ('frame', 'lane_crop'):
+            engine = MLEngine({'ml': {'quantization': False, 'model_type': model_type,
+                                      'model_path': os.path.join(directory, 'note_detector.pth'),
+                                      'lane_model_path': os.path.join(directory, 'lane_detector.pth')},
+                               'game': {'lanes': lanes, 'accuracy_threshold': 0.5}})
+            torch.manual_seed(0)
+            engine.train(training, epochs=epochs, learning_rate=3e-3)
+            engine.load_model()
+            
+            found = false_alarms = missed = 0
+            errors = []
+            for frame, notes in evaluation:
+                truth = {note['lane']: note['position'] for note in notes}
+                detected = {int(lane): float(position) for lane, position, _ in
+                            engine.detect_notes_array(frame).tolist()}
+                found += len(truth.keys() & detected.keys())
+                false_alarms += len(detected.keys() - truth.keys())
+                missed += len(truth.keys() - detected.keys())
+                errors.extend(abs(truth[lane] - detected[lane]) for lane in truth.keys() & detected.keys())
+            
+            start = time.perf_counter()
+            for frame, _ in evaluation:
+                engine.detect_notes_array(frame)
+            results[model_type] = {
+                'recall': found / max(1, found + missed),
+                'false_alarms': false_alarms,
+                'position_error': float(np.mean(errors)) if errors else 0.0,
+                'latency_ms': (time.perf_counter() - start) * 1000 / eval_frames
+            }
+    
+    print(f"Frames: {train_frames} training, {eval_frames} evaluation of {width}x{height}")
+    for name, result in results.items():
+        print(f"  - {name:<10} recall {result['recall']:.1%}, "
+              f"{result['false_alarms']} false alarms, "
+              f"position error {result['position_error']:.4f}, "
+              f"{result['latency_ms']:.3f} ms/frame")
+    print()
+    return results
+
+
+def benchmark_detection_cascade(frames: int = 300, spacings=(360, 2400, 6000)):
+    """CNN on every frame vs cascade: tier-1 recall and average detection cost"""
+    print("=" * 60)
+    print("BENCHMARK: Detection Cascade")
+    print("=" * 60)
+    
+    from capture_backends import SyntheticBackend
+    from detection_cascade import DetectionCascade
+    from ml_engine import MLEngine
+    
+    engine = MLEngine({'ml': {'quantization': True}, 'game': {'lanes': 9}})
+    engine.load_model()
+    top, bottom = engine.crop_band
+    region = {'left': 0, 'top': 0, 'width': 1920, 'height': 1080}
+    rows = slice(round(1080 * top), round(1080 * bottom))
+    lane_width = 1920 // 9
+    
+    results = {}
+    for spacing in spacings:
+        # Larger note spacing = sparser chart
+        backend = SyntheticBackend({'synthetic': {'note_spacing': spacing}})
+        clip = []
+        for _ in range(frames):
+            clip.append(np.array(backend.grab(region)))
+            backend.start_time -= 1 / 60.0
+        
+        cascade = DetectionCascade(engine.detect_notes, num_lanes=9, band=engine.crop_band)
+        missed = present = detected = 0
+        cascade_ms = full_ms = 0.0
+        for frame in clip:
+            start = time.perf_counter()
+            engine.detect_notes(frame)
+            full_ms += (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            candidates = cascade.candidates(frame)
+            if candidates.any():
+                engine.detect_notes(frame)
+                detected += 1
+            cascade_ms += (time.perf_counter() - start) * 1000
+            
+            # Ground truth: lanes with note pixels inside the band
+            truth = (frame[rows, :lane_width * 9, 0] == 230).reshape(-1, 9, lane_width).any(axis=(0, 2))
+            present += int(truth.sum())
+            missed += int((truth & ~candidates).sum())
+        
+        results[spacing] = {
+            'tier2_ratio': detected / frames,
+            'tier1_recall': 1.0 - missed / present if present else 1.0,
+            'full_ms': full_ms / frames,
+            'cascade_ms': cascade_ms / frames
+        }
+    
+    print(f"Frames: {frames} of 1920x1080 per chart")
+    for spacing, result in results.items():
+        print(f"  - spacing {spacing:>4} px: CNN on {result['tier2_ratio']:6.1%} of frames, "
+              f"tier-1 recall {result['tier1_recall']:.1%}, "
+              f"{result['full_ms']:.3f} -> {result['cascade_ms']:.3f} ms/frame")
+    print()
+    return results
+
+
+def benchmark_autotuner(iterations: int = 50):
+    """Heuristic settings (2 threads, quantized eager) vs the autotuned winner"""
+    print("=" * 60)
+    print("BENCHMARK: Inference Autotuner")
+    print("=" * 60)
+    
+    import os
+    import tempfile
+    from autotuner import InferenceAutotuner
+    from config_manager import ConfigManager
+    
+    with tempfile.TemporaryDirectory() as directory:
+        config = ConfigManager(os.path.join(directory, 'config.json')).config
+        config['ml']['model_path'] = os.path.join(directory, 'note_detector.pth')
+        tuner = InferenceAutotuner(config, iterations=iterations)
+        
+        heuristic = {'cpu_threads': min(2, max(1, (os.cpu_count() or 1) // 2)),
+                     'quantization': True, 'backend': 'eager', 'channels_last': False}
+        heuristic_ms = tuner.measure(heuristic)
+        
+        start = time.perf_counter()
+        record = tuner.run()
+        tuning_s = time.perf_counter() - start
+    
+    print(f"  - Heuristic {heuristic}: {heuristic_ms:.3f} ms/frame")
+    print(f"  - Autotuned {record['settings']}: {record['latency_ms']:.3f} ms/frame")
+    print(f"Speedup: {heuristic_ms / record['latency_ms']:.2f}x "
+          f"({record['candidates']} candidates in {tuning_s:.1f}s)")
+    print()
+    return {'heuristic_ms': heuristic_ms, 'tuned_ms': record['latency_ms'],
+            'tuning_s': tuning_s}
+
+
+def benchmark_inference_pool(frames: int = 200, process_counts=(1, 2, 4)):
+    """Detection throughput of threads in one process vs worker processes"""
+    print("=" * 60)
+    print("BENCHMARK: Inference Process Pool")
+    print("=" * 60)
+    
+    import os
+    import tempfile
+    import torch
+    from concurrent.futures import ThreadPoolExecutor
+    from ml_engine import MLEngine, NoteDetectorModel
+    
+    rng = np.random.default_rng(0)
+    clip = [rng.integers(0, 255, (270, 1920, 3), dtype=np.uint8) for _ in range(8)]
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = os.path.join(directory, 'note_detector.pth')
+        torch.save(NoteDetectorModel(num_lanes=9).state_dict(), model_path)
+        
+        for processes in (0,) + tuple(process_counts):
+            # One caller thread per process, like the pipeline's detect workers
+            callers = max(1, processes)
+            engine = MLEngine({'ml': {'quantization': True, 'model_path': model_path,
+                                      'inference_processes': processes},
+                               'hardware': {'cpu_threads': callers},
+                               'game': {'lanes': 9}})
+            if not engine.load_model() or (processes and engine.process_pool is None):
+                continue
+            
+            with ThreadPoolExecutor(callers) as pool:
+                list(pool.map(engine.detect_notes_array, clip))
+                start = time.perf_counter()
+                list(pool.map(lambda i: engine.detect_notes_array(clip[i % len(clip)]),
+                              range(frames)))
+                elapsed = time.perf_counter() - start
+            results[processes] = frames / elapsed
+            engine.disable_process_pool()
+    
+    for processes, fps in results.items():
+        label = f"{processes} processes" if processes else "in-process"
+        print(f"  - {label:<12} {fps:8.1f} frames/s")
+    print(f"CPU count: {os.cpu_count()}")
+    print()
+    return results
+
+
+def benchmark_pattern_cache(lookups: int = 50000, budgets_mb=(0.05, 1, 512)):
+    """recognize_pattern hit ratio, footprint and cost for several cache budgets"""
+    print("=" * 60)
+    print("BENCHMARK: Pattern Cache")
+    print("=" * 60)
+    
+    from ml_engine import MLEngine
+    
+    # Zipf-distributed patterns: a few recur constantly, most are rare
+    rng = np.random.default_rng(0)
+    seeds = rng.zipf(1.3, lookups) % 200000
+    sequences = {seed: [{'lane': int(seed // 9 ** i) % 9, 'time': i * 0.1} for i in range(10)]
+                 for seed in set(seeds.tolist())}
+    
+    results = {}
+    for budget in budgets_mb:
+        engine = MLEngine({'hardware': {'cache_size_mb': budget}})
+        start = time.perf_counter()
+        for seed in seeds.tolist():
+            engine.recognize_pattern(sequences[seed])
+        elapsed_us = (time.perf_counter() - start) * 1e6 / lookups
+        results[budget] = dict(engine.pattern_cache.get_stats(), us_per_call=elapsed_us)
+    
+    for budget, stats in results.items():
+        print(f"  - {budget:>7} MB: hit ratio {stats['hit_ratio']:.1%}, "
+              f"{stats['entries']:6d} patterns in {stats['bytes'] / 1024:8.1f} KB, "
+              f"{stats['evictions']:6d} evicted, {stats['us_per_call']:.2f} µs/call")
+    print()
+    return results
+
+
+def main():
+    """Run all benchmarks"""
+    print("\n" + "=" * 60)
+    print("CLUB M STAR AUTOINPUT - PERFORMANCE BENCHMARK")
+    print("=" * 60 + "\n")
+    
+    benchmarks = [
+        ("Capture Allocations", benchmark_capture_allocations),
+        ("ROI Capture", benchmark_roi_capture),
+        ("Change Gate", benchmark_change_gate),
+        ("Replay Throughput", benchmark_replay_throughput),
+        ("Capture Backends", benchmark_capture_backends),
+        ("Lane Brightness", benchmark_lane_brightness),
+        ("Dispatch Jitter", benchmark_dispatch_jitter),
+        ("Batched Inference", benchmark_batched_inference),
+        ("Preprocessing", benchmark_preprocessing),
+        ("Static Quantization", benchmark_static_quantization),
+        ("Inference Backends", benchmark_inference_backends),
+        ("Lane-Crop Model", benchmark_lane_crop_model),
+        ("Detection Cascade", benchmark_detection_cascade),
+        ("Inference Autotuner", benchmark_autotuner),
+        ("Inference Process Pool", benchmark_inference_pool),
+        ("Pattern Cache", benchmark_pattern_cache),
+    ]
+    
+    failed = 0
+    
+    for name, benchmark_func in benchmarks:
+        try:
+            start = time.perf_counter()
+            benchmark_func()
+            print(f"({name}: {time.perf_counter() - start:.1f}s)\n")
+        except Exception as e:
+            print(f"\n✗ {name} crashed: {e}\n")
+            traceback.print_exc()
+            failed += 1
+    
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Capture Backends for Club M Star AutoInput System
+Interchangeable screen grabbers (mss, recorded replay, synthetic) behind one interface
+"""
+
+import time
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional
+
+from frame_recorder import FrameReplay, RecordedShot
+
+
+class CaptureBackend:
+    """Base class for capture backends
+    
+    grab() returns an mss-style shot with raw BGRA bytes, width and height,
+    and times every call so backends can be compared on grab latency.
+    """
+    
+    name = 'base'
+    thread_safe = True  # False: every thread needs its own instance
+    realtime = True  # False: frames carry their own (recorded) capture times
+    
+    def __init__(self, config: Optional[Dict] = None, history_size: int = 100):
+        """Initialize backend"""
+        self.config = config or {}
+        self.grab_times = deque(maxlen=history_size)
+        self.grab_count = 0
+    
+    @property
+    def monitors(self) -> List[Dict]:
+        """Capture areas shaped like mss monitors (index 1 = primary)"""
+        raise NotImplementedError
+    
+    def grab(self, region: Dict):
+        """Grab a region and record its latency"""
+        start_time = time.perf_counter()
+        shot = self._grab(region)
+        self.grab_times.append((time.perf_counter() - start_time) * 1000)
+        self.grab_count += 1
+        return shot
+    
+    def _grab(self, region: Dict):
+        """Backend-specific grab"""
+        raise NotImplementedError
+    
+    def capture_time(self, shot) -> float:
+        """perf_counter time a grabbed shot shows"""
+        return time.perf_counter()
+    
+    def for_thread(self) -> 'CaptureBackend':
+        """Get an instance usable from the calling thread"""
+        if self.thread_safe:
+            return self
+        return self.__class__(self.config)
+    
+    def close(self):
+        """Release backend resources"""
+        pass
+    
+    def get_stats(self) -> Dict:
+        """Get grab latency statistics"""
+        times = list(self.grab_times)
+        return {
+            'backend': self.name,
+            'grabs': self.grab_count,
+            'avg_grab_ms': float(np.mean(times)) if times else 0.0,
+            'p99_grab_ms': float(np.percentile(times, 99)) if times else 0.0
+        }
+
+
+class MSSBackend(CaptureBackend):
+    """Live screen capture through mss"""
+    
+    name = 'mss'
+    thread_safe = False  # mss handles are bound to the thread that made them
+    
+    def __init__(self, config: Optional[Dict] = None, history_size: int = 100):
+        """Open mss handle"""
+        super().__init__(config, history_size)
+        import mss
+        self.sct = mss.mss()
+    
+    @property
+    def monitors(self) -> List[Dict]:
+        """Monitors reported by mss"""
+        return self.sct.monitors
+    
+    def _grab(self, region: Dict):
+        """Grab region from the screen"""
+        return self.sct.grab(region)
+    
+    def close(self):
+        """Close mss handle"""
+        self.sct.close()
+
+
+class ReplayBackend(CaptureBackend):
+    """Replays a recording made with FrameRecorder"""
+    
+    name = 'replay'
+    
+    def __init__(self, config: Optional[Dict] = None, history_size: int = 100):
+        """Open recording"""
+        super().__init__(config, history_size)
+        self.replay = FrameReplay(
+            self.config.get('replay_path', ''),
+            realtime=self.config.get('replay_realtime', True),
+            loop=self.config.get('replay_loop', False)
+        )
+        self.realtime = self.replay.realtime
+    
+    @property
+    def monitors(self) -> List[Dict]:
+        """Recorded area"""
+        return self.replay.monitors
+    
+    def _grab(self, region: Dict):
+        """Next recorded grab (the region was fixed at record time)"""
+        return self.replay.grab(region)
+    
+    def capture_time(self, shot) -> float:
+        """Recorded grab time, unless replay is paced to the wall clock"""
+        if self.realtime:
+            return time.perf_counter()
+        return shot.timestamp
+    
+    def close(self):
+        """Close recording"""
+        self.replay.close()
+
+
+class SyntheticBackend(CaptureBackend):
+    """Generates scrolling note lanes, for benchmarks and tests without a screen"""
+    
+    name = 'synthetic'
+    
+    def __init__(self, config: Optional[Dict] = None, history_size: int = 100):
+        """Initialize generator"""
+        super().__init__(config, history_size)
+        synthetic = self.config.get('synthetic', {})
+        self.width = synthetic.get('width', 1920)
+        self.height = synthetic.get('height', 1080)
+        self.num_lanes = synthetic.get('lanes', 9)
+        self.scroll_speed = synthetic.get('scroll_speed', 600)  # pixels per second
+        self.note_height = synthetic.get('note_height', 24)
+        self.note_spacing = synthetic.get('note_spacing', 360)
+        
+        # Fixed per-lane phase so the chart is the same on every run
+        rng = np.random.default_rng(synthetic.get('seed', 0))
+        self.phases = rng.integers(0, self.note_spacing, self.num_lanes)
+        self.start_time = time.monotonic()
+    
+    @property
+    def monitors(self) -> List[Dict]:
+        """Virtual screen"""
+        area = {'left': 0, 'top': 0, 'width': self.width, 'height': self.height}
+        return [area, area]
+    
+    def _grab(self, region: Dict):
+        """Render the notes visible in region at the current time"""
+        width, height = region['width'], region['height']
+        frame = np.zeros((height, width, 4), dtype=np.uint8)
+        frame[:, :, 3] = 255
+        
+        scroll = int((time.monotonic() - self.start_time) * self.scroll_speed)
+        lane_width = self.width / self.num_lanes
+        
+        for lane in range(self.num_lanes):
+            # Lane body in screen space, clipped to the requested region
+            x0 = int(lane * lane_width + lane_width * 0.1) - region['left']
+            x1 = int((lane + 1) * lane_width - lane_width * 0.1) - region['left']
+            x0, x1 = max(0, x0), min(width, x1)
+            if x0 >= x1:
+                continue
+            
+            first = (scroll + self.phases[lane]) % self.note_spacing - self.note_spacing
+            for y in range(first, self.height, self.note_spacing):
+                y0 = max(0, y - region['top'])
+                y1 = min(height, y + self.note_height - region['top'])
+                if y0 < y1:
+                    frame[y0:y1, x0:x1, :3] = 230
+        
+        return RecordedShot(memoryview(frame).cast('B'), width, height)
+
+
+CAPTURE_BACKENDS = {
+    'mss': MSSBackend,
+    'replay': ReplayBackend,
+    'synthetic': SyntheticBackend
+}
+
+
+def register_capture_backend(name: str, backend_class: type):
+    """Register a custom capture backend under a config name"""
+    CAPTURE_BACKENDS[name] = backend_class
+
+
+def create_capture_backend(capture_config: Dict) -> CaptureBackend:
+    """Create the backend selected by capture.backend in config"""
+    name = capture_config.get('backend', 'mss')
+    
+    # A replay_path on its own is enough to select replay
+    if name == 'mss' and capture_config.get('replay_path'):
+        name = 'replay'
+    
+    if name not in CAPTURE_BACKENDS:
+        raise ValueError(f"Bilinmeyen yakalama arka ucu: {name}")
+    
+    return CAPTURE_BACKENDS[name](capture_config)
+
+
+if __name__ == "__main__":
+    # Test synthetic capture backend
+    backend = create_capture_backend({'backend': 'synthetic'})
+    region = backend.monitors[1]
+    
+    for _ in range(10):
+        shot = backend.grab(region)
+    
+    print(f"Kare boyutu: {shot.width}x{shot.height}")
+    print("Arka uç istatistikleri:", backend.get_stats())
@@ -22,14 +22,64 @@ class ConfigManager:
         },
         "ml": {
             "model_path": "models/note_detector.pth",
+            "model_type": "frame",
+            "lane_model_path": "models/lane_detector.pth",
             "quantization": True,
-            "device": "cpu"
+            "quantization_mode": "dynamic",
+            "calibration_dir": "recordings",
+            "calibration_frames": 200,
+            "device": "cpu",
+            "backend": "eager",
+            "channels_last": False,
+            "autotune": True,
+            "micro_batching": False,
+            "micro_batch_wait_ms": 5,
+            "inference_processes": 0,
+            "pattern_cache_path": "",
+            "cascade": False,
+            "cascade_threshold": 24.0
         },
         "game": {
             "lanes": 9,
             "timing_offset_ms": 50,
             "accuracy_threshold": 0.95
         },
+        "capture": {
+            "ring_buffer": True,
+            "ring_size": 3,
+            "pixel_format": "bgr",
+            "capture_thread": True,
+            "roi_mode": "full",
+            "hit_line": 0.85,
+            "lookahead": 0.2,
+            "hit_margin": 0.05,
+            "lane_strip_width": 0.4,
+            "change_gate": True,
+            "change_threshold": 6.0,
+            "max_skipped_frames": 30,
+            "backend": "mss",
+            "record_path": "",
+            "replay_path": "",
+            "replay_realtime": True,
+            "replay_loop": False
+        },
+        "pipeline": {
+            "frame_queue_size": 1,
+            "frame_queue_policy": "drop_oldest",
+            "detection_queue_size": 4,
+            "detection_queue_policy": "block",
+            "detect_workers": 1
+        },
+        "input": {
+            "key_hold_ms": 50,
+            "chord_window_ms": 10,
+            "hold_release_grace_ms": 50,
+            "hold_min_length": 0.1,
+            "hold_brightness": 120.0,
+            "dedup_window_ms": 40,
+            "reschedule_tolerance_ms": 4,
+            "spin_threshold_ms": 1.5
+        },
         "cloud": {
             "api_url": "https://api.mstar-sync.example.com",
             "sync_interval_sec": 300
@@ -115,14 +165,35 @@ class ConfigManager:
             print(f"Donanım algılanırken hata: {e}")
             return {}
     
+    def autotune_inference(self, force: bool = False, iterations: int = 50) -> Dict[str, Any]:
+        """Benchmark inference settings and keep the fastest; skipped if still current"""
+        from autotuner import InferenceAutotuner
+        
+        tuner = InferenceAutotuner(self.config, iterations=iterations)
+        if not force and tuner.is_current():
+            return self.config['autotune']
+        
+        print("Çıkarım ayarları bu donanım için ölçülüyor...")
+        record = tuner.tune(force=True)
+        print(f"En hızlı ayarlar: {record['settings']} ({record['latency_ms']:.3f} ms/kare)")
+        self.save_config()
+        return record
+    
     def optimize_for_hardware(self):
         """Auto-optimize settings based on detected hardware"""
         hw_info = self.detect_hardware()
         
-        # Adjust thread count based on CPU
-        cpu_threads = hw_info.get('cpu_threads', 2)
-        optimal_threads = min(2, max(1, cpu_threads // 2))
-        self.set('hardware.cpu_threads', optimal_threads)
+        # Measure threads, backend and quantization; estimate if that is off or fails
+        tuned = False
+        if self.get('ml.autotune', True):
+            try:
+                self.autotune_inference(force=True)
+                tuned = True
+            except Exception as e:
+                print(f"Otomatik ayar hatası: {e}")
+        if not tuned:
+            cpu_threads = hw_info.get('cpu_threads', 2)
+            self.set('hardware.cpu_threads', max(1, cpu_threads // 2))
         
         # Adjust batch size based on RAM
         ram_gb = hw_info.get('ram_gb', 8)
@@ -0,0 +1,142 @@
+"""
+Detection Cascade for Club M Star AutoInput System
+Cheap per-lane pixel test that decides which frames the CNN has to see
+"""
+
+import threading
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+
+from lane_detection import subsample_resize
+
+
+class DetectionCascade:
+    """Two-tier note detector: a per-lane brightness test gates the CNN
+    
+    Tier 1 runs on every frame. It shrinks the band around the hit line
+    to a grid of rows x lanes cells and flags a lane as a candidate when
+    one of its cells is brighter than that cell's background by more
+    than threshold. The background is the running level of the cell when
+    its lane is empty: it follows darker frames at once and brighter
+    ones slowly, so static lane art and the hit line itself never count.
+    Only frames with a candidate reach tier 2, the detector. Its
+    detections inside the band are kept in candidate lanes only; those
+    outside the band, which tier 1 cannot see, are all kept. A note is
+    therefore tracked from the first frame in which any lane has a
+    candidate, so lead time ahead of the band depends on other notes.
+    """
+    
+    def __init__(self, detector: Callable[[np.ndarray], List[Dict]], num_lanes: int = 9,
+                 band: Tuple[float, float] = (0.0, 1.0), threshold: float = 24.0,
+                 rows: int = 16, background_rate: float = 0.05):
+        """Initialize cascade"""
+        self.detector = detector
+        self.num_lanes = num_lanes
+        self.band = band
+        self.threshold = threshold
+        self.rows = rows
+        self.background_rate = background_rate
+        
+        self._small = None
+        self._background = None
+        self._lock = threading.Lock()  # detect workers share the background and counters
+        
+        # Statistics
+        self.frames_checked = 0
+        self.frames_rejected = 0
+        self.frames_detected = 0
+        self.candidate_lanes = 0
+        self.detections_filtered = 0
+    
+    def candidates(self, frame: np.ndarray) -> np.ndarray:
+        """Tier 1: (lanes,) bool mask of lanes that may hold a note"""
+        height, width = frame.shape[:2]
+        lane_width = width // self.num_lanes
+        band = frame[round(height * self.band[0]):round(height * self.band[1]),
+                     :lane_width * self.num_lanes]
+        if band.size == 0:
+            return np.ones(self.num_lanes, dtype=bool)
+        
+        with self._lock:
+            channels = frame.shape[2]
+            if self._small is None or self._small.shape[2] != channels:
+                self._small = np.empty((self.rows, self.num_lanes, channels), dtype=np.uint8)
+                self._background = None
+            
+            subsample_resize(band, (self.num_lanes, self.rows), dst=self._small)
+            cells = self._small[:, :, :3].mean(axis=2)
+            
+            if self._background is None:
+                # Nothing to compare with yet: every lane is a candidate
+                self._background = cells
+                return np.ones(self.num_lanes, dtype=bool)
+            
+            candidates = (cells - self._background > self.threshold).any(axis=0)
+            
+            # Darker cells reset the background, empty lanes drift towards the frame
+            np.minimum(self._background, cells, out=self._background)
+            empty = ~candidates
+            self._background[:, empty] += self.background_rate * (
+                cells[:, empty] - self._background[:, empty])
+            return candidates
+    
+    def detect(self, frame: np.ndarray) -> List[Dict]:
+        """Run tier 1, and the detector if any lane is a candidate"""
+        candidates = self.candidates(frame)
+        with self._lock:
+            self.frames_checked += 1
+            self.candidate_lanes += int(candidates.sum())
+            if not candidates.any():
+                self.frames_rejected += 1
+                return []
+            self.frames_detected += 1
+        
+        detections = self.detector(frame)
+        top, bottom = self.band
+        kept = [note for note in detections
+                if 0 <= note['lane'] < self.num_lanes and
+                (candidates[note['lane']] or not top <= note.get('position', top) <= bottom)]
+        with self._lock:
+            self.detections_filtered += len(detections) - len(kept)
+        return kept
+    
+    def reset(self):
+        """Forget the background so the next frame goes to the detector"""
+        with self._lock:
+            self._background = None
+    
+    def reset_stats(self):
+        """Reset tier statistics"""
+        with self._lock:
+            self.frames_checked = 0
+            self.frames_rejected = 0
+            self.frames_detected = 0
+            self.candidate_lanes = 0
+            self.detections_filtered = 0
+    
+    def get_stats(self) -> Dict:
+        """Get tier statistics"""
+        checked = self.frames_checked
+        return {
+            'frames_checked': checked,
+            'tier1_rejected': self.frames_rejected,
+            'tier2_frames': self.frames_detected,
+            'tier2_ratio': self.frames_detected / checked if checked else 0.0,
+            'candidate_lane_ratio': self.candidate_lanes / (checked * self.num_lanes) if checked else 0.0,
+            'detections_filtered': self.detections_filtered
+        }
+
+
+if __name__ == "__main__":
+    # Test cascade with a detector that reports a note in every lane
+    def every_lane(frame):
+        return [{'lane': lane, 'position': 0.8, 'confidence': 1.0} for lane in range(9)]
+    
+    cascade = DetectionCascade(every_lane, num_lanes=9, band=(0.65, 0.9))
+    frame = np.full((270, 900, 3), 40, dtype=np.uint8)
+    
+    print("İlk kare:", len(cascade.detect(frame)), "nota")
+    print("Boş kare:", len(cascade.detect(frame)), "nota")
+    frame[200:210, 310:390] = 230
+    print("Şerit 3'te nota:", [note['lane'] for note in cascade.detect(frame)])
+    print("Katman istatistikleri:", cascade.get_stats())
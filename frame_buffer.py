@@ -0,0 +1,150 @@
+"""
+Frame Buffer for Club M Star AutoInput System
+Preallocated ring of reusable frame buffers for zero-copy screen capture
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class FrameRingBuffer:
+    """Ring of preallocated frame buffers that capture writes into"""
+    
+    PIXEL_FORMATS = {'bgr': 3, 'bgra': 4}
+    
+    def __init__(self, size: int = 3, pixel_format: str = 'bgr'):
+        """Initialize ring buffer"""
+        if pixel_format not in self.PIXEL_FORMATS:
+            raise ValueError(f"Desteklenmeyen piksel formatı: {pixel_format}")
+        
+        self.size = max(1, size)
+        self.pixel_format = pixel_format
+        self.channels = self.PIXEL_FORMATS[pixel_format]
+        
+        # Slots are (re)allocated lazily when the frame shape changes
+        self.slots: List[np.ndarray] = []
+        self.shape: Optional[Tuple[int, int, int]] = None
+        self.index = 0
+        
+        # Statistics
+        self.frames_written = 0
+        self.reallocations = 0
+    
+    def write(self, raw, width: int, height: int,
+              exclude: Sequence[np.ndarray] = ()) -> np.ndarray:
+        """Write a raw BGRA grab into the next slot and return it as a view"""
+        src = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+        
+        self.frames_written += 1
+        
+        # BGRA consumers read the grab buffer directly, no copy needed
+        if self.channels == 4:
+            return src
+        
+        slot = self._next_slot(height, width, exclude)
+        cv2.cvtColor(src, cv2.COLOR_BGRA2BGR, dst=slot)
+        return slot
+    
+    def write_tiles(self, grabs: Sequence[Tuple[bytes, int, int]],
+                    exclude: Sequence[np.ndarray] = ()) -> np.ndarray:
+        """Write same-height BGRA grabs side by side into one slot"""
+        height = grabs[0][2]
+        width = sum(grab_width for _, grab_width, _ in grabs)
+        slot = self._next_slot(height, width, exclude)
+        
+        x = 0
+        for raw, grab_width, grab_height in grabs:
+            src = np.frombuffer(raw, dtype=np.uint8).reshape(grab_height, grab_width, 4)
+            slot[:, x:x + grab_width] = src[:, :, :self.channels]
+            x += grab_width
+        
+        self.frames_written += 1
+        return slot
+    
+    def _next_slot(self, height: int, width: int,
+                   exclude: Sequence[np.ndarray] = ()) -> np.ndarray:
+        """Return the next reusable slot, reallocating on shape change"""
+        shape = (height, width, self.channels)
+        if shape != self.shape:
+            self.slots = [np.empty(shape, dtype=np.uint8) for _ in range(self.size)]
+            self.shape = shape
+            self.index = 0
+            self.reallocations += 1
+        
+        # Skip slots still owned by a consumer (e.g. the capture mailbox)
+        for _ in range(self.size):
+            slot = self.slots[self.index]
+            self.index = (self.index + 1) % self.size
+            if not any(slot is frame for frame in exclude):
+                return slot
+        
+        raise RuntimeError("Tüm ring buffer slotları kullanımda")
+    
+    def nbytes(self) -> int:
+        """Get total bytes held by the ring"""
+        return sum(slot.nbytes for slot in self.slots)
+    
+    def get_stats(self) -> Dict:
+        """Get ring buffer statistics"""
+        return {
+            'size': self.size,
+            'pixel_format': self.pixel_format,
+            'frames_written': self.frames_written,
+            'reallocations': self.reallocations,
+            'buffer_bytes': self.nbytes()
+        }
+
+
+
+def build_capture_rois(region: Dict, num_lanes: int, mode: str = 'full',
+                       hit_line: float = 0.85, lookahead: float = 0.2,
+                       hit_margin: float = 0.05, strip_width: float = 0.4) -> List[Dict]:
+    """Build mss capture regions around the hit line inside a game region
+    
+    mode 'full' grabs the whole region, 'band' one band across all lanes
+    and 'lanes' one narrow strip centred in each lane. Vertical extents are
+    fractions of the region height, strip_width a fraction of a lane.
+    """
+    if mode == 'full':
+        return [dict(region)]
+    
+    if mode not in ('band', 'lanes'):
+        raise ValueError(f"Bilinmeyen ROI modu: {mode}")
+    
+    top = round(region['height'] * max(0.0, hit_line - lookahead))
+    bottom = round(region['height'] * min(1.0, hit_line + hit_margin))
+    band = {
+        'left': region['left'],
+        'top': region['top'] + top,
+        'width': region['width'],
+        'height': max(1, bottom - top)
+    }
+    
+    if mode == 'band':
+        return [band]
+    
+    lane_width = region['width'] / num_lanes
+    width = max(1, int(lane_width * strip_width))
+    rois = []
+    for lane in range(num_lanes):
+        center = region['left'] + (lane + 0.5) * lane_width
+        rois.append({
+            'left': int(center - width / 2),
+            'top': band['top'],
+            'width': width,
+            'height': band['height']
+        })
+    return rois
+
+
+if __name__ == "__main__":
+    # Test frame ring buffer
+    ring = FrameRingBuffer(size=3, pixel_format='bgr')
+    raw = bytearray(640 * 480 * 4)
+    
+    for _ in range(5):
+        frame = ring.write(raw, 640, 480)
+    
+    print(f"Kare boyutu: {frame.shape}")
+    print("Ring buffer istatistikleri:", ring.get_stats())
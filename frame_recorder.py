@@ -0,0 +1,221 @@
+"""
+Frame Recorder for Club M Star AutoInput System
+Records capture grabs into memory-mapped raw files and replays them headlessly
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import time
+import numpy as np
+from typing import Dict, List, Optional
+
+
+# File layout: fixed header, raw BGRA frames back to back, then the index
+MAGIC = b'MSTRREC1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQ')  # magic, version, frame_count, index_offset
+HEADER_SIZE = 64
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'),
+    ('timestamp', '<f8'),
+    ('left', '<i4'),
+    ('top', '<i4'),
+    ('width', '<u4'),
+    ('height', '<u4')
+])
+
+
+class RecordedShot:
+    """mss-compatible view of one recorded BGRA grab"""
+    
+    def __init__(self, raw: memoryview, width: int, height: int,
+                 timestamp: Optional[float] = None):
+        """Wrap recorded bytes"""
+        self.raw = raw
+        self.width = width
+        self.height = height
+        self.timestamp = timestamp  # perf_counter time of the original grab
+    
+    def __array__(self, dtype=None, copy=None):
+        """Copy out as an (height, width, 4) array, like mss ScreenShot"""
+        frame = np.frombuffer(self.raw, dtype=np.uint8).reshape(self.height, self.width, 4)
+        return frame.astype(dtype) if dtype is not None else frame.copy()
+
+
+class FrameRecorder:
+    """Appends BGRA grabs and their timestamps to a memory-mapped file
+    
+    Timestamps default to time.perf_counter(), the clock the pipeline
+    compares capture and hit times on.
+    """
+    
+    def __init__(self, path: str, initial_size_mb: int = 64):
+        """Create recording file"""
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._file = open(path, 'w+b')
+        self._capacity = HEADER_SIZE + initial_size_mb * 1024 * 1024
+        self._file.truncate(self._capacity)
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+        self._write_offset = HEADER_SIZE
+        self._index: List[tuple] = []
+    
+    def write(self, raw, width: int, height: int, left: int = 0, top: int = 0,
+              timestamp: Optional[float] = None):
+        """Append one raw BGRA grab"""
+        size = width * height * 4
+        self._reserve(size)
+        
+        self._mmap[self._write_offset:self._write_offset + size] = raw
+        self._index.append((
+            self._write_offset,
+            time.perf_counter() if timestamp is None else timestamp,
+            left, top, width, height
+        ))
+        self._write_offset += size
+    
+    def _reserve(self, size: int):
+        """Grow the mapping (doubling) until size more bytes fit"""
+        if self._write_offset + size <= self._capacity:
+            return
+        
+        while self._write_offset + size > self._capacity:
+            self._capacity *= 2
+        
+        self._mmap.close()
+        self._file.truncate(self._capacity)
+        self._mmap = mmap.mmap(self._file.fileno(), self._capacity)
+    
+    @property
+    def frame_count(self) -> int:
+        """Number of grabs recorded so far"""
+        return len(self._index)
+    
+    def close(self):
+        """Write index and header, then trim the file to its used size"""
+        if self._file.closed:
+            return
+        
+        index = np.array(self._index, dtype=INDEX_DTYPE).tobytes()
+        self._reserve(len(index))
+        index_offset = self._write_offset
+        self._mmap[index_offset:index_offset + len(index)] = index
+        self._mmap[0:HEADER.size] = HEADER.pack(MAGIC, VERSION, len(self._index), index_offset)
+        
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.truncate(index_offset + len(index))
+        self._file.close()
+    
+    def __enter__(self):
+        """Use as context manager"""
+        return self
+    
+    def __exit__(self, *exc):
+        """Close on context exit"""
+        self.close()
+
+
+class FrameReplay:
+    """Replays a recording through the mss grab() interface"""
+    
+    def __init__(self, path: str, realtime: bool = True, speed: float = 1.0,
+                 loop: bool = False):
+        """Open recording for replay"""
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, frame_count, index_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Geçersiz kayıt dosyası: {path}")
+        
+        self.index = np.frombuffer(self._mmap, dtype=INDEX_DTYPE,
+                                   count=frame_count, offset=index_offset)
+        self.frame_count = frame_count
+        self.position = 0
+        self._start_time = None
+        self._view = memoryview(self._mmap)
+    
+    @property
+    def monitors(self) -> List[Dict]:
+        """Recorded area, shaped like mss monitors (index 1 = primary)"""
+        if self.frame_count == 0:
+            area = {'left': 0, 'top': 0, 'width': 0, 'height': 0}
+        else:
+            first = self.index[0]
+            area = {'left': int(first['left']), 'top': int(first['top']),
+                    'width': int(first['width']), 'height': int(first['height'])}
+        return [area, area]
+    
+    def grab(self, region: Optional[Dict] = None) -> RecordedShot:
+        """Return the next recorded grab, paced like the original capture"""
+        if self.position >= self.frame_count:
+            if not self.loop or self.frame_count == 0:
+                raise EOFError("Kayıt sonuna ulaşıldı")
+            self.position = 0
+            self._start_time = None
+        
+        entry = self.index[self.position]
+        self.position += 1
+        
+        if self.realtime:
+            self._wait_for(entry['timestamp'] - self.index[0]['timestamp'])
+        
+        offset = int(entry['offset'])
+        width, height = int(entry['width']), int(entry['height'])
+        return RecordedShot(self._view[offset:offset + width * height * 4], width, height,
+                            float(entry['timestamp']))
+    
+    def _wait_for(self, elapsed: float):
+        """Sleep until the recorded offset from the first grab is reached"""
+        now = time.perf_counter()
+        if self._start_time is None:
+            self._start_time = now
+        
+        delay = self._start_time + elapsed / self.speed - now
+        if delay > 0:
+            time.sleep(delay)
+    
+    def rewind(self):
+        """Restart replay from the first grab"""
+        self.position = 0
+        self._start_time = None
+    
+    def close(self):
+        """Release the mapping"""
+        if self._file.closed:
+            return
+        self.index = None
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # A consumer still holds a zero-copy frame; GC unmaps it later
+            pass
+        self._file.close()
+
+
+if __name__ == "__main__":
+    # Test record and replay
+    path = os.path.join(tempfile.gettempdir(), 'mstar_test_recording.raw')
+    
+    with FrameRecorder(path, initial_size_mb=1) as recorder:
+        for i in range(10):
+            frame = np.full((48, 64, 4), i, dtype=np.uint8)
+            recorder.write(frame, 64, 48, timestamp=i * 0.01)
+    
+    replay = FrameReplay(path, realtime=False)
+    print(f"Kayıttaki kare sayısı: {replay.frame_count}")
+    print(f"İlk kare boyutu: {np.array(replay.grab()).shape}")
+    replay.close()
+    os.remove(path)
@@ -5,13 +5,23 @@ Handles screen capture, note detection, and input automation
 
 import cv2
 import numpy as np
-import mss
 import time
-from pynput.keyboard import Controller as KeyboardController, Key
-from pynput.mouse import Controller as MouseController, Button
+from collections import deque
 from typing import Dict, List, Optional, Tuple
 import threading
 
+from frame_buffer import FrameRingBuffer, build_capture_rois
+from frame_gate import FrameChangeGate
+from detection_cascade import DetectionCascade
+from frame_recorder import FrameRecorder
+from capture_backends import create_capture_backend
+from lane_detection import lane_brightness, hold_lengths
+from note_tracker import NoteTracker, NoteDeduplicator, group_chords
+from input_scheduler import InputScheduler
+from precision_timer import PrecisionTimer
+from pipeline import Pipeline, PipelineStage, BoundedQueue, DROP_OLDEST, BLOCK
+from hold_notes import LaneKeyStateMachine
+
 
 class GameController:
     """Controls game automation including screen capture and input"""
@@ -19,24 +29,119 @@ class GameController:
     # Key mappings for lanes (customizable)
     DEFAULT_LANE_KEYS = ['s', 'd', 'f', 'space', 'j', 'k', 'l', ';', "'"]
     
-    def __init__(self, config: Dict, ml_engine=None):
+    def __init__(self, config: Dict, ml_engine=None, keyboard=None):
         """Initialize game controller"""
         self.config = config
         self.ml_engine = ml_engine
         
-        # Input controllers
-        self.keyboard = KeyboardController()
-        self.mouse = MouseController()
+        # Key sender: anything with press/release, pynput's unless one is given
+        self.keyboard = keyboard if keyboard is not None else self._create_keyboard()
         
-        # Screen capture
-        self.sct = mss.mss()
+        # Screen capture (backend selected by capture.backend)
+        capture_config = config.get('capture', {})
+        self.capture_backend = create_capture_backend(capture_config)
         self.capture_region = None
+        self.recorder = None
+        
+        # Capture, detection and scheduling run as pipeline stages on their
+        # own threads (capture_thread) or in turn on one thread
+        self.use_capture_thread = capture_config.get('capture_thread', True)
+        self.pipeline_config = config.get('pipeline', {})
+        self.pipeline = None
+        # One detect thread per inference process keeps every process busy;
+        # the schedule stage puts their results back in capture order
+        self._reorder: List[Tuple[List[Dict], float]] = []
+        self.detect_workers = max(self.pipeline_config.get('detect_workers', 1),
+                                  config.get('ml', {}).get('inference_processes', 0))
+        
+        # Zero-copy capture into reusable frame buffers
+        self.frame_buffer = None
+        if capture_config.get('ring_buffer', True):
+            ring_size = capture_config.get('ring_size', 3)
+            if self.use_capture_thread:
+                # Capture writes one slot while queued and in-detection frames hold the rest
+                ring_size = max(ring_size, self.pipeline_config.get('frame_queue_size', 1) +
+                                self.detect_workers + 1)
+            self.frame_buffer = FrameRingBuffer(
+                size=ring_size,
+                pixel_format=capture_config.get('pixel_format', 'bgr')
+            )
+        
+        # Regions of interest around the hit line (None = whole region)
+        self.roi_config = capture_config
+        self.capture_rois = None
+        self.last_capture_bytes = 0
+        
+        # Capture backends are per thread (mss handles are thread-bound);
+        # their grab times are kept for statistics after they close
+        self._capture_local = threading.local()
+        self._thread_backends = []
+        self._closed_grab_times = deque(maxlen=100)
+        self._backends_lock = threading.Lock()
+        self.frame_ages = deque(maxlen=100)
         
         # Game settings
         self.num_lanes = config.get('game', {}).get('lanes', 9)
         self.timing_offset = config.get('game', {}).get('timing_offset_ms', 50)
         self.lane_keys = self.DEFAULT_LANE_KEYS[:self.num_lanes]
         
+        # Key events are queued with deadlines and sent by one dispatcher thread
+        self.key_hold_ms = config.get('input', {}).get('key_hold_ms', 50)
+        self.chord_window_ms = config.get('input', {}).get('chord_window_ms', 10)
+        self.input_scheduler = InputScheduler(
+            self.keyboard,
+            timer=PrecisionTimer(config.get('input', {}).get('spin_threshold_ms', 1.5))
+        )
+        
+        # Each physical note is pressed once, not once per frame it is seen in;
+        # its pending press moves while the hit-time estimate improves
+        self.note_dedup = NoteDeduplicator(
+            window_ms=config.get('input', {}).get('dedup_window_ms', 40),
+            tolerance_ms=config.get('input', {}).get('reschedule_tolerance_ms', 4)
+        )
+        self._chords: Dict[int, Dict] = {}  # scheduler tag -> pending tap chord
+        self._chord_of_track: Dict[int, int] = {}
+        self._next_chord = 0
+        
+        # Hold notes keep their lane's key down until the tail passes
+        self.hold_keys = LaneKeyStateMachine(
+            num_lanes=self.num_lanes,
+            release_grace_ms=config.get('input', {}).get('hold_release_grace_ms', 50)
+        )
+        # The CNN reports note heads only; hold bodies are measured from the frame
+        self.hold_min_length = config.get('input', {}).get('hold_min_length', 0.1)
+        self.hold_brightness = config.get('input', {}).get('hold_brightness', 120.0)
+        
+        # Skip detection on frames that did not change (menus, breaks)
+        self.change_gate = None
+        if capture_config.get('change_gate', True):
+            self.change_gate = FrameChangeGate(
+                num_lanes=self.num_lanes,
+                threshold=capture_config.get('change_threshold', 6.0),
+                max_skipped_frames=capture_config.get('max_skipped_frames', 30)
+            )
+        self.last_detections = []
+        self.detection_times = []
+        self._gate_lock = threading.Lock()
+        
+        # Cascade: a per-lane pixel test decides which frames reach the CNN
+        self.cascade = None
+        ml_config = config.get('ml', {})
+        if ml_engine is not None and ml_config.get('cascade', False):
+            self.cascade = DetectionCascade(
+                ml_engine.detect_notes,
+                num_lanes=self.num_lanes,
+                band=ml_engine.crop_band,
+                threshold=ml_config.get('cascade_threshold', 24.0)
+            )
+        
+        # Follow notes across frames to predict when they reach the hit line
+        self.note_tracker = NoteTracker(
+            num_lanes=self.num_lanes,
+            hit_line=self._frame_hit_line(),
+            fallback_latency_ms=self.timing_offset
+        )
+        
         # State
         self.running = False
         self.paused = False
@@ -52,6 +157,15 @@ class GameController:
         self.frame_times = []
         self.last_frame = None
         
+        if self.use_capture_thread:
+            self.pipeline = self._build_pipeline()
+    
+    @staticmethod
+    def _create_keyboard():
+        """pynput keyboard, imported here because it needs a display"""
+        from pynput.keyboard import Controller as KeyboardController
+        return KeyboardController()
+    
     def set_capture_region(self, x: int, y: int, width: int, height: int):
         """Set screen capture region"""
         self.capture_region = {
@@ -60,34 +174,74 @@ class GameController:
             'width': width,
             'height': height
         }
+        self._update_capture_rois()
+    
+    def set_capture_rois(self, rois: List[Dict]):
+        """Set explicit capture regions, grabbed side by side as one frame"""
+        if len({roi['height'] for roi in rois}) > 1:
+            raise ValueError("Tüm ROI bölgeleri aynı yükseklikte olmalı")
+        self.capture_rois = [dict(roi) for roi in rois]
+    
+    def _update_capture_rois(self):
+        """Derive capture ROIs from the game region and config"""
+        mode = self.roi_config.get('roi_mode', 'full')
+        if mode == 'full':
+            self.capture_rois = None
+            return
+        
+        self.capture_rois = build_capture_rois(
+            self.capture_region,
+            self.num_lanes,
+            mode=mode,
+            hit_line=self.roi_config.get('hit_line', 0.85),
+            lookahead=self.roi_config.get('lookahead', 0.2),
+            hit_margin=self.roi_config.get('hit_margin', 0.05),
+            strip_width=self.roi_config.get('lane_strip_width', 0.4)
+        )
+    
+    def _frame_hit_line(self) -> float:
+        """Hit line as a fraction of the detection frame height"""
+        hit_line = self.roi_config.get('hit_line', 0.85)
+        if self.roi_config.get('roi_mode', 'full') == 'full':
+            return hit_line
+        
+        # ROI frames only span the band around the hit line
+        top = max(0.0, hit_line - self.roi_config.get('lookahead', 0.2))
+        bottom = min(1.0, hit_line + self.roi_config.get('hit_margin', 0.05))
+        return (hit_line - top) / (bottom - top)
     
     def auto_detect_game_window(self) -> bool:
         """Auto-detect game window (placeholder - needs window detection)"""
         # Default to full screen for now
-        monitor = self.sct.monitors[1]  # Primary monitor
+        monitor = self.capture_backend.monitors[1]  # Primary monitor
         self.capture_region = {
             'left': monitor['left'],
             'top': monitor['top'],
             'width': monitor['width'],
             'height': monitor['height']
         }
+        self._update_capture_rois()
         print(f"Oyun penceresi algılandı: {self.capture_region}")
         return True
     
     def capture_screen(self) -> Optional[np.ndarray]:
         """Capture screen region"""
-        if not self.capture_region:
+        return self._capture_with(self.capture_backend)
+    
+    def _capture_with(self, backend, exclude=()) -> Optional[np.ndarray]:
+        """Capture screen region with the given capture backend"""
+        if not self.capture_region and not self.capture_rois:
             self.auto_detect_game_window()
         
         try:
             start_time = time.time()
+            self._capture_local.captured_at = None
             
-            # Capture screen
-            screenshot = self.sct.grab(self.capture_region)
-            frame = np.array(screenshot)
-            
-            # Convert BGRA to BGR
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+            # Capture screen (or only the configured regions of interest)
+            if self.capture_rois and len(self.capture_rois) > 1:
+                frame = self._capture_tiles(backend, exclude)
+            else:
+                frame = self._capture_region(backend, exclude)
             
             # Record frame time
             frame_time = (time.time() - start_time) * 1000
@@ -98,47 +252,130 @@ class GameController:
             self.last_frame = frame
             return frame
             
+        except EOFError:
+            print("Kayıt oynatma tamamlandı")
+            self.running = False
+            return None
+            
         except Exception as e:
             print(f"Ekran yakalama hatası: {e}")
             return None
     
+    def _grab(self, backend, region: Dict):
+        """Grab one region, recording it when a recording is active"""
+        screenshot = backend.grab(region)
+        if getattr(self._capture_local, 'captured_at', None) is None:
+            # A tiled frame shows the time of its first grab
+            self._capture_local.captured_at = backend.capture_time(screenshot)
+        if self.recorder is not None:
+            self.recorder.write(screenshot.raw, screenshot.width, screenshot.height,
+                                region['left'], region['top'])
+        return screenshot
+    
+    def start_recording(self, path: str):
+        """Record every grab with its timestamp into a replayable file"""
+        self.stop_recording()
+        self.recorder = FrameRecorder(path)
+        print(f"Kayıt başlatıldı: {path}")
+    
+    def stop_recording(self):
+        """Finish the active recording"""
+        if self.recorder is None:
+            return
+        recorder, self.recorder = self.recorder, None
+        recorder.close()
+        print(f"Kayıt tamamlandı: {recorder.frame_count} kare")
+    
+    def _capture_region(self, backend, exclude=()) -> np.ndarray:
+        """Grab the capture region (or the single ROI) as one frame"""
+        region = self.capture_rois[0] if self.capture_rois else self.capture_region
+        screenshot = self._grab(backend, region)
+        self.last_capture_bytes = len(screenshot.raw)
+        
+        if self.frame_buffer is not None:
+            # Write straight into the ring, consumers get a view
+            return self.frame_buffer.write(
+                screenshot.raw, screenshot.width, screenshot.height, exclude
+            )
+        
+        frame = np.array(screenshot)
+        
+        # Convert BGRA to BGR
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+    
+    def _capture_tiles(self, backend, exclude=()) -> np.ndarray:
+        """Grab each ROI and join them side by side, one tile per lane"""
+        screenshots = [self._grab(backend, roi) for roi in self.capture_rois]
+        self.last_capture_bytes = sum(len(shot.raw) for shot in screenshots)
+        
+        if self.frame_buffer is not None:
+            return self.frame_buffer.write_tiles(
+                [(shot.raw, shot.width, shot.height) for shot in screenshots], exclude
+            )
+        
+        return np.hstack([
+            cv2.cvtColor(np.array(shot), cv2.COLOR_BGRA2BGR) for shot in screenshots
+        ])
+    
     def detect_notes_in_frame(self, frame: np.ndarray) -> List[Dict]:
-        """Detect notes in captured frame"""
-        if self.ml_engine:
-            return self.ml_engine.detect_notes(frame)
+        """Detect notes in captured frame; reused results carry 'gated': True"""
+        # Unchanged frame: reuse the previous result instead of detecting again
+        if self.change_gate is not None:
+            with self._gate_lock:
+                changed = self.change_gate.has_changed(frame)
+            if not changed:
+                return [dict(note, gated=True) for note in self.last_detections]
+        
+        start_time = time.time()
+        
+        if self.cascade is not None:
+            detections = self._measure_holds(frame, self.cascade.detect(frame))
+        elif self.ml_engine:
+            detections = self._measure_holds(frame, self.ml_engine.detect_notes(frame))
         else:
             # Fallback: simple color-based detection
-            return self._simple_note_detection(frame)
+            detections = self._simple_note_detection(frame)
+        
+        self.detection_times.append((time.time() - start_time) * 1000)
+        if len(self.detection_times) > 100:
+            self.detection_times.pop(0)
+        
+        self.last_detections = detections
+        return detections
+    
+    def _measure_holds(self, frame: np.ndarray, detections: List[Dict]) -> List[Dict]:
+        """Give model detections the length of the hold body above their head"""
+        if detections:
+            lengths = hold_lengths(frame, self.num_lanes,
+                                   [note['lane'] for note in detections],
+                                   [note['position'] for note in detections],
+                                   threshold=self.hold_brightness,
+                                   min_length=self.hold_min_length)
+            for note, length in zip(detections, lengths):
+                note['length'] = float(length)
+        return detections
     
     def _simple_note_detection(self, frame: np.ndarray) -> List[Dict]:
         """Simple color-based note detection (fallback)"""
-        detections = []
+        # Mean brightness of the top third of every lane (where notes
+        # typically appear), computed for all lanes at once
+        brightness = lane_brightness(frame, self.num_lanes)
         
-        # This is a placeholder - actual implementation would analyze
-        # specific regions of the frame for note indicators
-        height, width = frame.shape[:2]
-        lane_width = width // self.num_lanes
+        # A lane that is also bright at the hit line has a hold body
+        # running down to it
+        hit_line = self.note_tracker.hit_line
+        at_hit_line = lane_brightness(frame, self.num_lanes, top=hit_line - 0.02,
+                                      bottom=hit_line + 0.02)
         
-        for lane in range(self.num_lanes):
-            # Check specific region for each lane
-            x_start = lane * lane_width
-            x_end = (lane + 1) * lane_width
-            
-            # Check top portion for notes (where they typically appear)
-            region = frame[0:height//3, x_start:x_end]
-            
-            # Simple brightness check (notes are usually bright)
-            avg_brightness = np.mean(region)
-            
-            if avg_brightness > 150:  # Threshold
-                detections.append({
-                    'lane': lane,
-                    'position': 0.0,
-                    'confidence': avg_brightness / 255.0,
-                    'time': time.time()
-                })
-        
-        return detections
+        # Simple brightness check (notes are usually bright); there is no
+        # position, so the tracker schedules these at its fallback latency
+        now = time.time()
+        return [{
+            'lane': int(lane),
+            'length': hit_line if at_hit_line[lane] > 150 else 0.0,
+            'confidence': float(brightness[lane]) / 255.0,
+            'time': now
+        } for lane in np.flatnonzero(brightness > 150)]  # Threshold
     
     def press_key(self, lane: int, duration_ms: int = 50):
         """Press key for specific lane"""
@@ -208,18 +445,47 @@ class GameController:
         self.notes_hit = 0
         self.notes_missed = 0
         self.total_timing_error = 0.0
+        self.frame_ages.clear()
+        self.last_detections = []
+        self._reorder = []
+        self.note_tracker.reset()
+        self.hold_keys.reset()
+        self.note_dedup.reset()
+        self._chords = {}
+        self._chord_of_track = {}
+        if self.change_gate:
+            self.change_gate.reset()
+        if self.cascade:
+            self.cascade.reset()
         
-        # Start automation in separate thread
-        self.automation_thread = threading.Thread(target=self._automation_loop, daemon=True)
-        self.automation_thread.start()
+        record_path = self.config.get('capture', {}).get('record_path')
+        if record_path:
+            self.start_recording(record_path)
+        
+        self.input_scheduler.start()
+        
+        # Start every stage on its own workers, or all of them on one thread
+        if self.pipeline is not None:
+            self.pipeline.start()
+        else:
+            self.automation_thread = threading.Thread(target=self._automation_loop, daemon=True)
+            self.automation_thread.start()
         
         print("Otomasyon başlatıldı")
     
     def stop_automation(self):
         """Stop automation loop"""
         self.running = False
+        if self.pipeline is not None:
+            self.pipeline.stop()
         if self.automation_thread:
             self.automation_thread.join(timeout=2.0)
+            self.automation_thread = None
+        # Stopping drops queued events, so held lanes are not released through
+        # the queue: stop() sends a key-up for every key whose key-down went out
+        self.input_scheduler.stop()
+        self.hold_keys.release_all(time.perf_counter())
+        self.stop_recording()
         print("Otomasyon durduruldu")
     
     def pause_automation(self):
@@ -232,38 +498,208 @@ class GameController:
         self.paused = False
         print("Otomasyon devam ettiriliyor")
     
-    def _automation_loop(self):
-        """Main automation loop"""
-        while self.running:
-            if self.paused:
-                time.sleep(0.1)
-                continue
-            
-            try:
-                # Capture frame
-                frame = self.capture_screen()
-                if frame is None:
+    def _build_pipeline(self) -> Pipeline:
+        """Wire capture -> detect -> schedule with bounded queues
+        
+        Frames default to a one-deep drop-oldest queue so detection always
+        gets the freshest frame; detections default to a blocking queue so
+        no note is lost between detection and scheduling. The input stage
+        is the input scheduler's own dispatcher thread.
+        """
+        frames = BoundedQueue(self.pipeline_config.get('frame_queue_size', 1),
+                              self.pipeline_config.get('frame_queue_policy', DROP_OLDEST))
+        detections = BoundedQueue(self.pipeline_config.get('detection_queue_size', 4),
+                                  self.pipeline_config.get('detection_queue_policy', BLOCK))
+        
+        return Pipeline([
+            PipelineStage('capture', self._capture_stage, outbox=frames,
+                          on_exit=self._close_thread_backend),
+            PipelineStage('detect', self._detect_stage, inbox=frames, outbox=detections,
+                          workers=self.detect_workers),
+            PipelineStage('schedule', self._schedule_stage, inbox=detections)
+        ])
+    
+    def _thread_backend(self):
+        """Capture backend owned by the calling thread"""
+        backend = getattr(self._capture_local, 'backend', None)
+        if backend is None:
+            backend = self._capture_local.backend = self.capture_backend.for_thread()
+            if backend is not self.capture_backend:
+                with self._backends_lock:
+                    self._thread_backends.append(backend)
+        return backend
+    
+    def _close_thread_backend(self):
+        """Close the calling thread's capture backend if it has its own"""
+        backend = getattr(self._capture_local, 'backend', None)
+        self._capture_local.backend = None
+        if backend is not None and backend is not self.capture_backend:
+            with self._backends_lock:
+                self._thread_backends.remove(backend)
+                self._closed_grab_times.extend(backend.grab_times)
+            backend.close()
+    
+    def _grab_times(self) -> List[float]:
+        """Recent grab latencies of every capture backend instance"""
+        with self._backends_lock:
+            times = list(self._closed_grab_times)
+            for backend in [self.capture_backend] + self._thread_backends:
+                times.extend(backend.grab_times)
+        return times
+    
+    def _frames_in_flight(self) -> Tuple[np.ndarray, ...]:
+        """Ring slots capture must not overwrite (queued or being detected)"""
+        if self.pipeline is None:
+            return ()
+        return tuple(item[0] for item in self.pipeline.stages['detect'].pending())
+    
+    def _capture_stage(self, _) -> Optional[Tuple[np.ndarray, float]]:
+        """Capture stage: next frame and its perf_counter capture time"""
+        if self.paused or not self.running:
+            time.sleep(0.1)
+            return None
+        
+        frame = self._capture_with(self._thread_backend(), self._frames_in_flight())
+        if frame is None:
+            time.sleep(0.01)
+            return None
+        
+        return frame, self._capture_local.captured_at
+    
+    def _detect_stage(self, item: Tuple[np.ndarray, float]) -> Tuple[List[Dict], float]:
+        """Detect stage: notes in a captured frame"""
+        frame, captured_at = item
+        if self.capture_backend.realtime:
+            self.frame_ages.append((time.perf_counter() - captured_at) * 1000)
+        return self.detect_notes_in_frame(frame), captured_at
+    
+    def _schedule_stage(self, item: Tuple[List[Dict], float]):
+        """Schedule stage: turn detections into timed key events"""
+        for notes, captured_at in self._in_capture_order(item):
+            self._schedule_detections(notes, captured_at)
+    
+    def _in_capture_order(self, item: Tuple[List[Dict], float]) -> List[Tuple[List[Dict], float]]:
+        """Detections that can be scheduled now, oldest frame first
+        
+        Parallel detect workers finish frames out of order, but the
+        tracker's velocities need them in capture order. A result is held
+        back while an older frame is still queued for or in detection, or
+        its result is queued behind this one; frames dropped from the
+        queue are not waited for.
+        """
+        if self.pipeline is None or self.detect_workers == 1:
+            return [item]
+        
+        # A frame moves from detection to the schedule inbox, so reading in
+        # that order sees it at least once
+        self._reorder.append(item)
+        outstanding = (self.pipeline.stages['detect'].pending() +
+                       self.pipeline.stages['schedule'].inbox.items())
+        oldest = min((captured_at for _, captured_at in outstanding), default=float('inf'))
+        ready = sorted((held for held in self._reorder if held[1] <= oldest),
+                       key=lambda held: held[1])
+        self._reorder = [held for held in self._reorder if held[1] > oldest]
+        return ready
+    
+    def _schedule_detections(self, notes: List[Dict], captured_at: float):
+        """Track one frame's detections and queue their key events"""
+        # Results reused from an unchanged frame repeat older positions; fed
+        # to the tracker at this frame's time they would stall its velocity fit
+        if any(note.get('gated') for note in notes):
+            return
+        
+        # Predict when each note crosses the hit line; a tracked note waits
+        # for a velocity estimate before it is first scheduled
+        tracked = self.note_tracker.update(notes, captured_at)
+        notes = [note for note in tracked if note['ready']]
+        
+        # Hold notes drive the per-lane key state machine; "now" is on the
+        # frames' clock, which is the recording's in non-realtime replay
+        now = time.perf_counter() if self.capture_backend.realtime else captured_at
+        holds = [note for note in notes if note.get('length', 0.0) > 0]
+        for action, lane, at in self.hold_keys.update(holds, now):
+            self.input_scheduler.schedule(at, action, [self.lane_keys[lane]])
+            if action == 'down':
+                self.notes_hit += 1
+        
+        # Taps in a lane whose key is held would only churn it; taps not
+        # ready yet only keep their track known to the deduplicator
+        taps = [note for note in tracked
+                if note.get('length', 0.0) <= 0 and not self.hold_keys.is_busy(note['lane'])]
+        self._schedule_taps(self.note_dedup.filter(taps, now), now)
+    
+    def _schedule_taps(self, taps: List[Dict], now: float):
+        """Queue new taps and move pending ones whose hit time was refined"""
+        window = self.note_dedup.window
+        for chord_id in [chord_id for chord_id, chord in self._chords.items()
+                         if chord['hit_time'] + window < now]:
+            for note in self._chords.pop(chord_id)['notes']:
+                self._chord_of_track.pop(note['track_id'], None)
+        
+        planned = {}
+        for note in taps:
+            chord_id = self._chord_of_track.get(note['track_id'])
+            if chord_id is None:
+                self.notes_hit += 1
+            elif chord_id in self._chords:
+                chord = self._chords[chord_id]
+                if not self.input_scheduler.cancel(chord_id):
+                    # Its key-down already went out; the press stays where it was
+                    self.note_dedup.restore(note['track_id'], chord['hit_time'])
                     continue
-                
-                # Detect notes
-                notes = self.detect_notes_in_frame(frame)
-                
-                # Process detected notes
-                for note in notes:
-                    # Apply timing offset
-                    timing_adjustment = self.timing_offset / 1000.0
-                    time.sleep(timing_adjustment)
+                # The rest of the cancelled chord is planned again alongside it
+                del self._chords[chord_id]
+                for member in chord['notes']:
+                    planned[member['track_id']] = member
+            planned[note['track_id']] = note
+        
+        # Notes due together go out as one chord with a shared timestamp
+        for chord in group_chords(list(planned.values()), self.chord_window_ms):
+            chord_id = self._next_chord
+            self._next_chord += 1
+            self._chords[chord_id] = chord
+            for note in chord['notes']:
+                self._chord_of_track[note['track_id']] = chord_id
+            self._schedule_chord(chord['lanes'], chord['hit_time'], chord_id)
+    
+    def _schedule_chord(self, lanes: List[int], hit_time: float, tag=None):
+        """Queue a tap of every lane's key together at a perf_counter time"""
+        keys = [self.lane_keys[lane] for lane in lanes if 0 <= lane < len(self.lane_keys)]
+        if keys:
+            self.input_scheduler.schedule_chord(keys, hit_time, self.key_hold_ms, tag)
+    
+    def _automation_loop(self):
+        """Main automation loop (capture_thread off): every stage in turn"""
+        try:
+            while self.running:
+                try:
+                    item = self._capture_stage(None)
+                    if item is None:
+                        continue
                     
-                    # Press corresponding key
-                    self.press_key(note['lane'])
-                    self.notes_hit += 1
-                
-                # Small delay to prevent excessive CPU usage
-                time.sleep(0.01)
-                
-            except Exception as e:
-                print(f"Otomasyon döngüsü hatası: {e}")
-                time.sleep(0.1)
+                    self._schedule_stage(self._detect_stage(item))
+                    
+                    # Small delay to prevent excessive CPU usage
+                    time.sleep(0.01)
+                    
+                except Exception as e:
+                    print(f"Otomasyon döngüsü hatası: {e}")
+                    time.sleep(0.1)
+        finally:
+            self._close_thread_backend()
+    
+    def get_pipeline_stats(self) -> Dict:
+        """Queue depth, service time and drops of every stage"""
+        stats = self.pipeline.get_stats() if self.pipeline is not None else {}
+        input_stats = self.input_scheduler.get_stats()
+        stats['input'] = {
+            'workers': 1,
+            'queue_depth': input_stats['pending_events'],
+            'items_processed': input_stats['events_dispatched'],
+            'errors': input_stats['dispatch_errors'],
+            'avg_jitter_ms': input_stats['avg_jitter_ms']
+        }
+        return stats
     
     def get_statistics(self) -> Dict:
         """Get automation statistics"""
@@ -277,6 +713,17 @@ class GameController:
         avg_frame_time = np.mean(self.frame_times) if self.frame_times else 0
         fps = 1000.0 / avg_frame_time if avg_frame_time > 0 else 0
         
+        # Detection time the change gate avoided, estimated from real detections
+        avg_detection_time = np.mean(self.detection_times) if self.detection_times else 0
+        gate_stats = self.change_gate.get_stats() if self.change_gate else {}
+        frames_skipped = gate_stats.get('frames_skipped', 0)
+        tracker_stats = self.note_tracker.get_stats()
+        input_stats = self.input_scheduler.get_stats()
+        hold_stats = self.hold_keys.get_stats()
+        dedup_stats = self.note_dedup.get_stats()
+        cascade_stats = self.cascade.get_stats() if self.cascade else {}
+        grab_times = self._grab_times()
+        
         return {
             'running': self.running,
             'paused': self.paused,
@@ -285,7 +732,29 @@ class GameController:
             'accuracy': accuracy,
             'session_duration_sec': session_duration,
             'avg_frame_time_ms': avg_frame_time,
-            'fps': fps
+            'fps': fps,
+            'capture_bytes_per_frame': self.last_capture_bytes,
+            'capture_backend': self.capture_backend.name,
+            'avg_grab_ms': float(np.mean(grab_times)) if grab_times else 0.0,
+            'frames_dropped': self.pipeline.stages['detect'].inbox.drops if self.pipeline else 0,
+            'avg_frame_age_ms': float(np.mean(self.frame_ages)) if self.frame_ages else 0.0,
+            'pipeline_bottleneck': self.pipeline.bottleneck() if self.pipeline else None,
+            'avg_detection_time_ms': avg_detection_time,
+            'detection_skip_ratio': gate_stats.get('skip_ratio', 0.0),
+            'detection_time_saved_ms': frames_skipped * avg_detection_time,
+            'cascade_tier1_rejected': cascade_stats.get('tier1_rejected', 0),
+            'cascade_tier2_frames': cascade_stats.get('tier2_frames', 0),
+            'cascade_tier2_ratio': cascade_stats.get('tier2_ratio', 1.0),
+            'cascade_candidate_lane_ratio': cascade_stats.get('candidate_lane_ratio', 1.0),
+            'tracked_notes': tracker_stats['tracks_started'],
+            'fallback_predictions': tracker_stats['fallback_predictions'],
+            'avg_input_jitter_ms': input_stats['avg_jitter_ms'],
+            'p99_input_jitter_ms': input_stats['p99_jitter_ms'],
+            'chords_dispatched': input_stats['chords_dispatched'],
+            'avg_chord_skew_ms': input_stats['avg_chord_skew_ms'],
+            'hold_notes': hold_stats['holds_started'],
+            'duplicates_suppressed': dedup_stats['duplicates_suppressed'],
+            'notes_rescheduled': dedup_stats['notes_rescheduled']
         }
     
     def get_accuracy(self) -> float:
@@ -300,6 +769,22 @@ class GameController:
         self.total_timing_error = 0.0
         self.session_start_time = time.time() if self.running else None
         self.frame_times.clear()
+        self.frame_ages.clear()
+        with self._backends_lock:
+            self._closed_grab_times.clear()
+            for backend in [self.capture_backend] + self._thread_backends:
+                backend.grab_times.clear()
+        if self.pipeline is not None:
+            self.pipeline.reset_stats()
+        self.detection_times.clear()
+        self.note_tracker.reset_stats()
+        self.input_scheduler.reset_stats()
+        self.hold_keys.reset_stats()
+        self.note_dedup.reset_stats()
+        if self.change_gate:
+            self.change_gate.reset_stats()
+        if self.cascade:
+            self.cascade.reset_stats()
 
 
 if __name__ == "__main__":
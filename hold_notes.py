@@ -0,0 +1,134 @@
+"""
+Hold Notes for Club M Star AutoInput System
+Per-lane key state machine that keeps keys down through long notes
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+
+IDLE = 'idle'
+PRESSED = 'pressed'
+HELD = 'held'
+RELEASED = 'released'
+
+
+class LaneKeyStateMachine:
+    """Tracks every lane's key through idle → pressed → held → released
+    
+    update() is fed the hold-note detections of each frame (tracked notes
+    carrying a 'length' body extent) and returns the key events to
+    schedule as (action, lane, time) tuples, with 'down'/'up' actions and
+    time.perf_counter() times. A lane stays down for as long as its hold
+    body keeps being detected and is released once the tail has passed.
+    """
+    
+    def __init__(self, num_lanes: int = 9, release_grace_ms: float = 50.0,
+                 min_velocity: float = 0.05):
+        """Initialize state machine"""
+        self.num_lanes = num_lanes
+        self.release_grace = release_grace_ms / 1000.0
+        self.min_velocity = min_velocity
+        
+        self.states = [IDLE] * num_lanes
+        self.press_times = [0.0] * num_lanes
+        self.release_times = [0.0] * num_lanes
+        self.last_seen = [0.0] * num_lanes
+        self.tail_times: List[Optional[float]] = [None] * num_lanes
+        
+        # Statistics
+        self.holds_started = 0
+        self.holds_released = 0
+    
+    def update(self, holds: List[Dict], now: float) -> List[Tuple[str, int, float]]:
+        """Advance every lane with this frame's hold detections"""
+        events = []
+        seen = {}
+        for note in holds:
+            if 0 <= note['lane'] < self.num_lanes:
+                seen[note['lane']] = note
+        
+        for lane in range(self.num_lanes):
+            state = self.states[lane]
+            note = seen.get(lane)
+            
+            if state == RELEASED and now >= self.release_times[lane]:
+                state = self.states[lane] = IDLE
+            
+            if state == IDLE and note is not None:
+                self.states[lane] = PRESSED
+                self.press_times[lane] = note['hit_time']
+                self.last_seen[lane] = now
+                self.tail_times[lane] = self._tail_time(note)
+                self.holds_started += 1
+                events.append(('down', lane, note['hit_time']))
+            
+            elif state in (PRESSED, HELD):
+                if state == PRESSED and now >= self.press_times[lane]:
+                    self.states[lane] = HELD
+                
+                if note is not None:
+                    self.last_seen[lane] = now
+                    self.tail_times[lane] = self._tail_time(note)
+                elif now - self.last_seen[lane] > self.release_grace:
+                    events.append(self._release(lane, now))
+        
+        return events
+    
+    def _tail_time(self, note: Dict) -> Optional[float]:
+        """Predicted time the hold tail crosses the hit line"""
+        if note.get('velocity', 0.0) < self.min_velocity:
+            return None
+        return note['hit_time'] + note['length'] / note['velocity']
+    
+    def _release(self, lane: int, now: float,
+                 wait_for_tail: bool = True) -> Tuple[str, int, float]:
+        """Move a lane to released and return its key-up event"""
+        # Never release before the key went down or before the predicted tail
+        release_time = max(now, self.press_times[lane])
+        if wait_for_tail and self.tail_times[lane] is not None:
+            release_time = max(release_time, self.tail_times[lane])
+        
+        self.states[lane] = RELEASED
+        self.release_times[lane] = release_time
+        self.holds_released += 1
+        return ('up', lane, release_time)
+    
+    def is_busy(self, lane: int) -> bool:
+        """True while the lane's key is owned by a hold note"""
+        return self.states[lane] != IDLE
+    
+    def release_all(self, now: float) -> List[Tuple[str, int, float]]:
+        """Release every pressed or held lane (e.g. when automation stops)"""
+        return [self._release(lane, now, wait_for_tail=False) for lane in range(self.num_lanes)
+                if self.states[lane] in (PRESSED, HELD)]
+    
+    def reset(self):
+        """Return every lane to idle without emitting events"""
+        self.states = [IDLE] * self.num_lanes
+        self.tail_times = [None] * self.num_lanes
+    
+    def reset_stats(self):
+        """Reset hold statistics"""
+        self.holds_started = 0
+        self.holds_released = 0
+    
+    def get_stats(self) -> Dict:
+        """Get hold statistics"""
+        return {
+            'holds_started': self.holds_started,
+            'holds_released': self.holds_released,
+            'lanes_held': sum(1 for state in self.states if state in (PRESSED, HELD))
+        }
+
+
+if __name__ == "__main__":
+    # Test a hold note on lane 2 seen for 3 frames
+    machine = LaneKeyStateMachine(num_lanes=9)
+    hold = {'lane': 2, 'hit_time': 0.05, 'length': 0.3, 'velocity': 1.0}
+    
+    for frame in range(8):
+        now = frame / 60.0
+        events = machine.update([hold] if frame < 3 else [], now)
+        print(f"{now:.3f} s: {machine.states[2]:8s} {events}")
+    
+    print("Uzun nota istatistikleri:", machine.get_stats())
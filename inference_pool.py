@@ -0,0 +1,291 @@
+"""
+Inference Process Pool for Club M Star AutoInput System
+Runs MLEngine detection in worker processes fed through shared-memory frames
+"""
+
+import copy
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from ml_engine import DETECTION_DTYPE, MLEngine
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Open an existing block without handing it to this process's resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 always tracks
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(config: Dict, tasks, results):
+    """Worker process: load the model, then detect frames named by the task queue
+    
+    Tasks are (task_id, slot, block name, frame shape); results go back as
+    (task_id, DETECTION_DTYPE bytes, inference ms).
+    """
+    engine = MLEngine(config)
+    results.put(('ready', os.getpid(), engine.load_model()))
+    
+    blocks: Dict[int, shared_memory.SharedMemory] = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            
+            task_id, slot, name, shape = task
+            block = blocks.get(slot)
+            if block is None or block.name != name:
+                # The parent grew this slot: drop the old mapping
+                if block is not None:
+                    block.close()
+                block = blocks[slot] = _attach(name)
+            
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=block.buf)
+            start_time = time.perf_counter()
+            records = engine.detect_notes_array(frame)
+            inference_ms = (time.perf_counter() - start_time) * 1000
+            del frame  # the block cannot close while a view exists
+            
+            results.put((task_id, records.tobytes(), inference_ms))
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+class InferenceProcessPool:
+    """Detection in worker processes, each with its own MLEngine and GIL
+    
+    submit() copies a frame into a free shared-memory slot and queues only
+    its slot, block name and shape; a worker maps the slot and runs
+    detect_notes_array on it in place, so no pixel data is pickled. The
+    detection records come back as raw bytes on a result queue, where a
+    collector thread resolves the caller's future and frees the slot.
+    Workers load the weights from disk, so the model must be saved before
+    the pool starts. If a worker dies the pool marks itself failed and
+    resolves every outstanding frame with no detections.
+    """
+    
+    def __init__(self, config: Dict, workers: int = 2, slots: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None, start_timeout: float = 60.0):
+        """Initialize pool"""
+        self.workers = max(1, workers)
+        self.num_slots = slots or self.workers * 2  # one queued frame per busy worker
+        self.start_timeout = start_timeout
+        
+        # Workers split the configured threads, never nest pools or batchers
+        # and leave the pattern cache file to this process
+        threads = config.get('hardware', {}).get('cpu_threads', 2)
+        self.worker_config = copy.deepcopy(config)
+        self.worker_config.setdefault('hardware', {})['cpu_threads'] = (
+            threads_per_worker or max(1, threads // self.workers))
+        ml_config = self.worker_config.setdefault('ml', {})
+        ml_config['inference_processes'] = 0
+        ml_config['micro_batching'] = False
+        ml_config['pattern_cache_path'] = ''
+        
+        # Spawned, not forked: a fork of a process running torch threads can deadlock
+        self._context = mp.get_context('spawn')
+        self._tasks = None
+        self._results = None
+        self._processes: List[mp.Process] = []
+        self._collector = None
+        self._running = False
+        self.failed = False
+        
+        self._slots: List[Optional[shared_memory.SharedMemory]] = [None] * self.num_slots
+        self._free_slots = list(range(self.num_slots))
+        self._pending: Dict[int, Tuple[int, Future, float]] = {}  # task -> slot, future, start
+        self._condition = threading.Condition()
+        self._next_task = 0
+        
+        # Statistics
+        self.frames_processed = 0
+        self.slot_waits = 0
+        self.inference_times = deque(maxlen=100)
+        self.roundtrip_times = deque(maxlen=100)
+    
+    def start(self) -> bool:
+        """Start the workers and wait until every one has loaded the model"""
+        if self._running:
+            return True
+        
+        self.failed = False
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self._processes = [
+            self._context.Process(target=_worker_main, name=f"inference-{i}",
+                                  args=(self.worker_config, self._tasks, self._results),
+                                  daemon=True)
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+        
+        deadline = time.perf_counter() + self.start_timeout
+        ready = 0
+        try:
+            while ready < self.workers:
+                _, _, loaded = self._results.get(timeout=max(0.0, deadline - time.perf_counter()))
+                if not loaded:
+                    raise RuntimeError("model yüklenemedi")
+                ready += 1
+        except Exception as e:
+            print(f"Çıkarım işlemleri başlatılamadı: {e}")
+            self._running = True
+            self.stop()
+            self.failed = True
+            return False
+        
+        self._running = True
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        print(f"Çıkarım {self.workers} işlemde çalışıyor")
+        return True
+    
+    def stop(self):
+        """Stop the workers; frames still in flight get no detections"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        
+        if self._collector:
+            self._collector.join(timeout=1.0)
+            self._collector = None
+        self._fail_pending()
+        
+        for block in self._slots:
+            if block is not None:
+                block.close()
+                block.unlink()
+        self._slots = [None] * self.num_slots
+        for q in (self._tasks, self._results):
+            q.close()
+            q.join_thread()
+    
+    def submit(self, frame: np.ndarray) -> Future:
+        """Queue a uint8 frame; the future resolves to its detection records"""
+        future = Future()
+        start_time = time.perf_counter()
+        with self._condition:
+            if not self._free_slots and self._running:
+                self.slot_waits += 1
+            self._condition.wait_for(lambda: self._free_slots or not self._running)
+            if not self._running or self.failed:
+                future.set_result(np.empty(0, dtype=DETECTION_DTYPE))
+                return future
+            slot = self._free_slots.pop()
+            task_id = self._next_task
+            self._next_task += 1
+            self._pending[task_id] = (slot, future, start_time)
+        
+        # The slot is ours until its result arrives, so it is filled unlocked
+        block = self._slots[slot]
+        if block is None or block.size < frame.nbytes:
+            if block is not None:
+                block.close()
+                block.unlink()
+            block = self._slots[slot] = shared_memory.SharedMemory(create=True,
+                                                                   size=max(1, frame.nbytes))
+        np.copyto(np.ndarray(frame.shape, dtype=np.uint8, buffer=block.buf), frame)
+        
+        self._tasks.put((task_id, slot, block.name, frame.shape))
+        return future
+    
+    def _collect(self):
+        """Resolve futures as results arrive; watch for dead workers"""
+        while self._running:
+            try:
+                task_id, records, inference_ms = self._results.get(timeout=0.1)
+            except queue.Empty:
+                if self._running and not all(p.is_alive() for p in self._processes):
+                    print("Çıkarım işlemi beklenmedik şekilde sonlandı")
+                    self.failed = True
+                    self._fail_pending()
+                    return
+                continue
+            
+            with self._condition:
+                slot, future, start_time = self._pending.pop(task_id)
+                self._free_slots.append(slot)
+                self._condition.notify()
+            
+            self.inference_times.append(inference_ms)
+            self.roundtrip_times.append((time.perf_counter() - start_time) * 1000)
+            self.frames_processed += 1
+            future.set_result(np.frombuffer(records, dtype=DETECTION_DTYPE).copy())
+    
+    def _fail_pending(self):
+        """Resolve every outstanding frame with no detections"""
+        with self._condition:
+            pending, self._pending = self._pending, {}
+            self._free_slots = list(range(self.num_slots))
+            self._condition.notify_all()
+        
+        for _, future, _ in pending.values():
+            future.set_result(np.empty(0, dtype=DETECTION_DTYPE))
+    
+    def reset_stats(self):
+        """Reset pool statistics"""
+        self.frames_processed = 0
+        self.slot_waits = 0
+        self.inference_times.clear()
+        self.roundtrip_times.clear()
+    
+    def get_stats(self) -> Dict:
+        """Get pool statistics"""
+        inference = list(self.inference_times)
+        roundtrip = list(self.roundtrip_times)
+        return {
+            'workers': self.workers,
+            'slots': self.num_slots,
+            'failed': self.failed,
+            'frames_processed': self.frames_processed,
+            'slot_waits': self.slot_waits,
+            'avg_inference_ms': float(np.mean(inference)) if inference else 0.0,
+            'avg_roundtrip_ms': float(np.mean(roundtrip)) if roundtrip else 0.0
+        }
+
+
+if __name__ == "__main__":
+    # Test pool against in-process detection on random frames
+    import torch
+    from ml_engine import NoteDetectorModel
+    
+    config = {'ml': {'quantization': False, 'model_path': 'models/pool_test.pth'},
+              'game': {'lanes': 9, 'accuracy_threshold': 0.5}}
+    torch.save(NoteDetectorModel(num_lanes=9).state_dict(), config['ml']['model_path'])
+    
+    engine = MLEngine(config)
+    engine.load_model()
+    frames = [np.random.default_rng(i).integers(0, 255, (270, 1920, 3), dtype=np.uint8)
+              for i in range(32)]
+    
+    pool = InferenceProcessPool(config, workers=2)
+    if pool.start():
+        futures = [pool.submit(frame) for frame in frames]
+        same = all(np.array_equal(future.result()['lane'], engine.detect_notes_array(frame)['lane'])
+                   for future, frame in zip(futures, frames))
+        print("Sonuçlar aynı:", same)
+        print("Havuz istatistikleri:", pool.get_stats())
+        pool.stop()
+    os.remove(config['ml']['model_path'])
@@ -0,0 +1,211 @@
+"""
+Input Scheduler for Club M Star AutoInput System
+Dispatches timestamped key-down/key-up events from a single thread
+"""
+
+import heapq
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+from precision_timer import PrecisionTimer
+
+
+KEY_DOWN = 'down'
+KEY_UP = 'up'
+
+
+class InputScheduler:
+    """Min-heap of key events issued by one dispatcher thread
+    
+    Callers only enqueue events with a time.perf_counter() deadline and
+    never sleep; the dispatcher waits for the earliest event, sends it to
+    the keyboard (any object with press/release, e.g. a pynput Controller)
+    and records how late it went out. An event may carry several keys
+    (a chord); they are sent back to back and the spread is recorded as
+    intra-chord skew. Events scheduled with a tag can be cancelled as a
+    group until their key-down goes out, so a press can be moved while
+    its timing estimate improves. The condition wait only brings the
+    dispatcher close to a deadline; the timer spins out the final stretch.
+    """
+    
+    def __init__(self, keyboard, history_size: int = 1000,
+                 timer: Optional[PrecisionTimer] = None):
+        """Initialize scheduler"""
+        self.keyboard = keyboard
+        self.timer = timer or PrecisionTimer()
+        
+        self._events: List[tuple] = []  # (time, sequence, action, keys, tag)
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._pressed = set()  # keys whose key-down went out and key-up did not
+        
+        # Statistics
+        self.jitter = deque(maxlen=history_size)  # dispatch lateness in ms
+        self.chord_skew = deque(maxlen=history_size)  # first-to-last key in ms
+        self.events_dispatched = 0
+        self.dispatch_errors = 0
+    
+    def start(self):
+        """Start the dispatcher thread"""
+        if self._running:
+            return
+        
+        self._running = True
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop dispatching, releasing keys that are still down"""
+        with self._condition:
+            self._running = False
+            self._events = []
+            self._condition.notify()
+        
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        
+        # Keys whose key-down never went out are not released
+        if self._pressed:
+            self._send(KEY_UP, tuple(sorted(self._pressed, key=str)))
+    
+    def schedule(self, at: float, action: str, keys: Sequence, tag=None):
+        """Queue a key-down or key-up of one or more keys at a perf_counter time"""
+        with self._condition:
+            heapq.heappush(self._events, (at, self._sequence, action, tuple(keys), tag))
+            self._sequence += 1
+            # Only wake the dispatcher if its next deadline moved earlier
+            if self._events[0][1] == self._sequence - 1:
+                self._condition.notify()
+    
+    def schedule_press(self, key, at: float, duration_ms: float = 50, tag=None):
+        """Queue a tap: key-down at at, key-up duration_ms later"""
+        self.schedule_chord([key], at, duration_ms, tag)
+    
+    def schedule_chord(self, keys: Sequence, at: float, duration_ms: float = 50, tag=None):
+        """Queue keys pressed and released together with a shared timestamp"""
+        self.schedule(at, KEY_DOWN, keys, tag)
+        self.schedule(at + duration_ms / 1000.0, KEY_UP, keys, tag)
+    
+    def cancel(self, tag) -> bool:
+        """Drop every event with tag, if its key-down has not gone out yet"""
+        if tag is None:
+            return False
+        
+        with self._condition:
+            if not any(event[4] == tag and event[2] == KEY_DOWN for event in self._events):
+                return False
+            self._events = [event for event in self._events if event[4] != tag]
+            heapq.heapify(self._events)
+            self._condition.notify()
+            return True
+    
+    def pending(self) -> int:
+        """Number of events waiting to be dispatched"""
+        with self._condition:
+            return len(self._events)
+    
+    def pending_events(self) -> List[tuple]:
+        """Queued (time, action, keys, tag) events, earliest first"""
+        with self._condition:
+            return [(at, action, keys, tag) for at, _, action, keys, tag in sorted(self._events)]
+    
+    def _dispatch_loop(self):
+        """Wait for the earliest event and send it"""
+        spin = self.timer.spin_ns / 1_000_000_000
+        
+        while True:
+            with self._condition:
+                while self._running and (not self._events or
+                                         self._events[0][0] - spin > time.perf_counter()):
+                    timeout = self._events[0][0] - spin - time.perf_counter() if self._events else None
+                    self._condition.wait(timeout)
+                
+                if not self._running:
+                    return
+                
+                deadline = self._events[0][0]
+            
+            # Precise final approach outside the lock so producers never wait on it
+            self.timer.wait_until(deadline)
+            
+            with self._condition:
+                # The event waited for may have been cancelled meanwhile
+                if not self._events or self._events[0][0] > deadline:
+                    continue
+                at, _, action, keys, _ = heapq.heappop(self._events)
+            
+            self.jitter.append((time.perf_counter() - at) * 1000)
+            self._send(action, keys)
+    
+    def _send(self, action: str, keys: tuple):
+        """Issue one key event for every key, back to back"""
+        send = self.keyboard.press if action == KEY_DOWN else self.keyboard.release
+        first_sent = None
+        
+        for key in keys:
+            try:
+                send(key)
+                self.events_dispatched += 1
+                if action == KEY_DOWN:
+                    self._pressed.add(key)
+                else:
+                    self._pressed.discard(key)
+            except Exception as e:
+                self.dispatch_errors += 1
+                print(f"Tuş olayı hatası ({action} {key}): {e}")
+            if first_sent is None:
+                first_sent = time.perf_counter()
+        
+        if len(keys) > 1 and action == KEY_DOWN:
+            self.chord_skew.append((time.perf_counter() - first_sent) * 1000)
+    
+    def reset_stats(self):
+        """Reset dispatch statistics"""
+        self.jitter.clear()
+        self.chord_skew.clear()
+        self.events_dispatched = 0
+        self.dispatch_errors = 0
+    
+    def get_stats(self) -> Dict:
+        """Get dispatch jitter statistics"""
+        jitter = list(self.jitter)
+        skew = list(self.chord_skew)
+        return {
+            'events_dispatched': self.events_dispatched,
+            'dispatch_errors': self.dispatch_errors,
+            'pending_events': self.pending(),
+            'avg_jitter_ms': float(np.mean(jitter)) if jitter else 0.0,
+            'p99_jitter_ms': float(np.percentile(jitter, 99)) if jitter else 0.0,
+            'max_jitter_ms': float(np.max(jitter)) if jitter else 0.0,
+            'chords_dispatched': len(skew),
+            'avg_chord_skew_ms': float(np.mean(skew)) if skew else 0.0,
+            'max_chord_skew_ms': float(np.max(skew)) if skew else 0.0
+        }
+
+
+if __name__ == "__main__":
+    # Test input scheduler with a keyboard that only logs
+    class PrintKeyboard:
+        def press(self, key):
+            print(f"  ↓ {key}")
+        
+        def release(self, key):
+            print(f"  ↑ {key}")
+    
+    scheduler = InputScheduler(PrintKeyboard())
+    scheduler.start()
+    
+    now = time.perf_counter()
+    for i, key in enumerate('sdf'):
+        scheduler.schedule_press(key, now + 0.05 * (i + 1))
+    scheduler.schedule_chord(['j', 'k'], now + 0.2)
+    
+    time.sleep(0.3)
+    scheduler.stop()
+    print("Zamanlayıcı istatistikleri:", scheduler.get_stats())
@@ -30,6 +30,8 @@ class MStarAutoInputGUI:
         
         # Initialize components
         self.config_manager = ConfigManager()
+        if self.config_manager.get('ml.autotune', True):
+            self._autotune_inference()
         self.ml_engine = MLEngine(self.config_manager.config)
         self.game_controller = GameController(self.config_manager.config, self.ml_engine)
         self.ai_coach = AICoach()
@@ -331,6 +333,13 @@ Kullanım:
         api_text.insert('1.0', api_docs)
         api_text.config(state='disabled')
     
+    def _autotune_inference(self):
+        """Measure inference settings unless this machine and model are already tuned"""
+        try:
+            self.config_manager.autotune_inference()
+        except Exception as e:
+            print(f"Otomatik ayar hatası: {e}")
+    
     def _initialize_ml_model(self):
         """Initialize ML model"""
         try:
@@ -538,7 +547,10 @@ Kullanım:
     
     def run(self):
         """Run the application"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.cleanup()
     
     def cleanup(self):
         """Cleanup on exit"""
@@ -547,6 +559,8 @@ Kullanım:
             self.game_controller.stop_automation()
         if self.mobile_server.running:
             self.mobile_server.stop()
+        self.ml_engine.disable_process_pool()
+        self.ml_engine.save_pattern_cache()
 
 
 def main():
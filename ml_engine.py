@@ -3,12 +3,22 @@ Machine Learning Engine for Club M Star AutoInput System
 CPU-optimized PyTorch-based note detection and pattern recognition
 """
 
+import cv2
 import torch
 import torch.nn as nn
 import numpy as np
+from torch.ao.quantization import QuantStub, DeQuantStub
 from typing import List, Dict, Tuple, Optional
+import hashlib
+import inspect
 import os
+import tempfile
+import threading
 import time
+from concurrent.futures import Future
+
+from lane_detection import subsample
+from pattern_cache import PatternCache
 
 
 class NoteDetectorModel(nn.Module):
@@ -35,7 +45,7 @@ class NoteDetectorModel(nn.Module):
         x = self.pool(self.relu(self.conv2(x)))
         x = self.pool(self.relu(self.conv3(x)))
         
-        x = x.view(x.size(0), -1)
+        x = x.reshape(x.size(0), -1)  # view() fails on channels_last activations
         x = self.relu(self.fc1(x))
         x = self.fc2(x)
         
@@ -43,6 +53,309 @@ class NoteDetectorModel(nn.Module):
         return x.view(-1, self.num_lanes, 2)
 
 
+class QuantizableNoteDetectorModel(NoteDetectorModel):
+    """NoteDetectorModel prepared for static INT8 quantization
+    
+    Same weights (state dicts are interchangeable), plus quant/dequant
+    stubs and one ReLU per layer so conv+relu and linear+relu can be fused.
+    """
+    
+    def __init__(self, num_lanes: int = 9):
+        super(QuantizableNoteDetectorModel, self).__init__(num_lanes)
+        self.quant = QuantStub()
+        self.dequant = DeQuantStub()
+        self.relu1 = nn.ReLU()
+        self.relu2 = nn.ReLU()
+        self.relu3 = nn.ReLU()
+        self.relu4 = nn.ReLU()
+    
+    def forward(self, x):
+        x = self.quant(x)
+        x = self.pool(self.relu1(self.conv1(x)))
+        x = self.pool(self.relu2(self.conv2(x)))
+        x = self.pool(self.relu3(self.conv3(x)))
+        
+        x = x.reshape(x.size(0), -1)
+        x = self.relu4(self.fc1(x))
+        x = self.dequant(self.fc2(x))
+        
+        return x.view(-1, self.num_lanes, 2)
+    
+    def fuse(self):
+        """Fuse conv+relu and linear+relu pairs in place"""
+        torch.ao.quantization.fuse_modules(
+            self, [['conv1', 'relu1'], ['conv2', 'relu2'], ['conv3', 'relu3'], ['fc1', 'relu4']],
+            inplace=True
+        )
+
+
+class LaneCropModel(nn.Module):
+    """Small CNN shared by every lane, fed narrow crops around the hit line
+    
+    Input is (batch, 3, 32, 8 * lanes): one 32x8 crop per lane of the band
+    above the hit line, laid side by side, so each lane gets 8 columns
+    instead of the 3-4 it has in a full-frame 32x32 thumbnail. The crops
+    are moved onto the batch axis, so the same weights score each lane in
+    a single pass and padding stops every kernel at its crop's edge: a
+    note in one lane cannot change another lane's scores. Output is
+    (batch, lanes, 2) like NoteDetectorModel, with positions as fractions
+    of the crop height.
+    """
+    
+    CROP_SIZE = (32, 8)  # height, width
+    
+    def __init__(self, num_lanes: int = 9):
+        super(LaneCropModel, self).__init__()
+        self.num_lanes = num_lanes
+        
+        self.conv1 = nn.Conv2d(3, 8, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(8, 16, kernel_size=3, padding=1)
+        self.conv3 = nn.Conv2d(16, 32, kernel_size=3, padding=1)
+        
+        self.pool = nn.MaxPool2d(2, 2)
+        self.relu = nn.ReLU()
+        
+        # Per-lane heads as convolutions: a 32x8 crop is 4x1 after three poolings
+        self.fc1 = nn.Conv2d(32, 32, kernel_size=(4, 1))
+        self.fc2 = nn.Conv2d(32, 2, kernel_size=1)  # position and confidence of the lane
+    
+    def forward(self, x):
+        # (batch, 3, 32, lanes * 8) -> (batch * lanes, 3, 32, 8)
+        height, width = self.CROP_SIZE
+        x = x.reshape(-1, 3, height, self.num_lanes, width).permute(0, 3, 1, 2, 4)
+        x = x.reshape(-1, 3, height, width)
+        
+        x = self.pool(self.relu(self.conv1(x)))
+        x = self.pool(self.relu(self.conv2(x)))
+        x = self.pool(self.relu(self.conv3(x)))
+        
+        x = self.relu(self.fc1(x))
+        x = self.fc2(x)
+        
+        # (batch * lanes, 2, 1, 1) -> (batch, lanes, 2)
+        return x.reshape(-1, self.num_lanes, 2)
+
+
+def load_calibration_frames(directory: str, max_frames: int = 200) -> List[np.ndarray]:
+    """Frames from FrameRecorder recordings (.raw) and images in a directory"""
+    frames = []
+    if not os.path.isdir(directory):
+        return frames
+    
+    from frame_recorder import FrameReplay
+    
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        extension = os.path.splitext(name)[1].lower()
+        
+        if extension == '.raw':
+            replay = FrameReplay(path, realtime=False)
+            try:
+                while len(frames) < max_frames and replay.position < replay.frame_count:
+                    frames.append(np.array(replay.grab()))
+            finally:
+                replay.close()
+        elif extension in ('.png', '.jpg', '.jpeg', '.bmp'):
+            image = cv2.imread(path)
+            if image is not None:
+                frames.append(image)
+        
+        if len(frames) >= max_frames:
+            break
+    
+    return frames
+
+
+class InferenceBackend:
+    """Runs a preprocessed (batch, 3, 32, 32) input through the detector
+    
+    Every backend returns the raw (batch, lanes, 2) output as a CPU
+    tensor, so post-processing does not depend on which one ran.
+    """
+    
+    name = 'none'
+    
+    def run(self, input_tensor: torch.Tensor) -> torch.Tensor:
+        """Forward pass"""
+        raise NotImplementedError
+
+
+class EagerBackend(InferenceBackend):
+    """PyTorch module called directly"""
+    
+    name = 'eager'
+    
+    def __init__(self, model: nn.Module):
+        self.model = model
+    
+    def run(self, input_tensor: torch.Tensor) -> torch.Tensor:
+        """Forward pass without autograd"""
+        with torch.no_grad():
+            return self.model(input_tensor)
+
+
+class TorchScriptBackend(EagerBackend):
+    """Frozen TorchScript graph; called like the eager module"""
+    
+    name = 'torchscript'
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPU session over an exported detector graph
+    
+    onnxruntime is optional and only imported here; a missing package
+    raises ImportError so the engine can fall back to PyTorch.
+    """
+    
+    name = 'onnxruntime'
+    
+    def __init__(self, onnx_path: str, threads: int = 2):
+        import onnxruntime
+        
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(onnx_path, options,
+                                                    providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+    
+    def run(self, input_tensor: torch.Tensor) -> torch.Tensor:
+        """Forward pass; the input buffer is shared with onnxruntime, not copied"""
+        output = self.session.run(None, {self.input_name: input_tensor.numpy()})[0]
+        return torch.from_numpy(output)
+
+
+def export_onnx(model: nn.Module, path: str, input_shape: Tuple[int, ...] = (3, 32, 32)):
+    """Write an fp32 detector model to an ONNX file with a dynamic batch axis"""
+    # Newer torch defaults to the torch.export based exporter, which needs
+    # onnxscript; the TorchScript based one handles this model fine
+    options = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        options['dynamo'] = False
+    
+    example = torch.zeros((1,) + tuple(input_shape))
+    torch.onnx.export(
+        model, example, path,
+        input_names=['input'], output_names=['output'],
+        dynamic_axes={'input': {0: 'batch'}, 'output': {0: 'batch'}},
+        **options
+    )
+
+
+def file_digest(path: str) -> str:
+    """First 16 hex digits of a file's SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+# Compact detection records: one row per detected note
+DETECTION_DTYPE = np.dtype([
+    ('lane', '<i4'),
+    ('position', '<f4'),
+    ('confidence', '<f4')
+])
+
+
+def detections_to_dicts(records: np.ndarray, timestamp: Optional[float] = None) -> List[Dict]:
+    """Expand detection records into the per-note dicts the controller uses"""
+    now = time.time() if timestamp is None else timestamp
+    return [{'lane': lane, 'position': position, 'confidence': confidence, 'time': now}
+            for lane, position, confidence in records.tolist()]
+
+
+class MicroBatcher:
+    """Collects frames from many callers into one forward pass
+    
+    A batch runs as soon as max_batch frames are waiting or max_wait_ms
+    after the first one arrived, whichever comes first.
+    """
+    
+    def __init__(self, engine: 'MLEngine', max_batch: int = 16, max_wait_ms: float = 5.0):
+        """Initialize batcher"""
+        self.engine = engine
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        
+        self._pending: List[Tuple[np.ndarray, Future]] = []
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+        
+        # Statistics
+        self.batches_run = 0
+        self.frames_batched = 0
+    
+    def start(self):
+        """Start the batching thread"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop batching; frames still waiting get no detections"""
+        with self._condition:
+            self._running = False
+            pending, self._pending = self._pending, []
+            self._condition.notify()
+        
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        
+        for _, future in pending:
+            future.set_result(np.empty(0, dtype=DETECTION_DTYPE))
+    
+    def submit(self, frame: np.ndarray) -> Future:
+        """Queue a frame; the future resolves to its detection records"""
+        future = Future()
+        with self._condition:
+            if not self._running:
+                future.set_result(np.empty(0, dtype=DETECTION_DTYPE))
+                return future
+            self._pending.append((frame, future))
+            self._condition.notify()
+        return future
+    
+    def _run(self):
+        """Wait for a full batch or the wait deadline, then run it"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or not self._running)
+                if not self._running:
+                    return
+                
+                deadline = time.perf_counter() + self.max_wait
+                while self._running and len(self._pending) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            
+            if not batch:
+                continue
+            
+            results = self.engine.detect_notes_batch_array([frame for frame, _ in batch])
+            for (_, future), detections in zip(batch, results):
+                future.set_result(detections)
+            
+            self.batches_run += 1
+            self.frames_batched += len(batch)
+    
+    def get_stats(self) -> Dict:
+        """Get batching statistics"""
+        return {
+            'batches_run': self.batches_run,
+            'avg_batch_size': self.frames_batched / self.batches_run if self.batches_run else 0.0
+        }
+
+
 class MLEngine:
     """Machine Learning engine for note detection and pattern recognition"""
     
@@ -56,26 +369,80 @@ class MLEngine:
         self.model = None
         self.model_loaded = False
         
+        # 'frame': one 32x32 thumbnail of the whole frame; 'lane_crop': one
+        # 32x8 crop per lane from the band around the hit line
+        self.model_type = config.get('ml', {}).get('model_type', 'frame')
+        if self.model_type == 'lane_crop':
+            crop_height, crop_width = LaneCropModel.CROP_SIZE
+            self.input_shape = (3, crop_height, crop_width * self.num_lanes)
+        else:
+            self.input_shape = (3, 32, 32)
+        self.crop_band = self._lane_crop_band()
+        
         # Performance optimization
         self.use_quantization = config.get('ml', {}).get('quantization', True)
+        self.quantization_mode = config.get('ml', {}).get('quantization_mode', 'dynamic')
+        self.quantized = None  # 'dynamic' or 'static' once applied
+        # Inference backend: 'eager', 'torchscript' or 'onnxruntime' (the
+        # older ml.torchscript flag still upgrades eager to TorchScript)
+        self.backend_name = config.get('ml', {}).get('backend', 'eager')
+        if self.backend_name == 'eager' and config.get('ml', {}).get('torchscript', False):
+            self.backend_name = 'torchscript'
+        self.backend = None
+        self.compiled = False
+        # NHWC weights and input buffers for the PyTorch backends
+        self.channels_last = config.get('ml', {}).get('channels_last', False)
+        self.memory_format = torch.contiguous_format
+        self.detection_threshold = config.get('game', {}).get('accuracy_threshold', 0.95)
         self.batch_size = config.get('hardware', {}).get('batch_size', 16)
+        self.micro_batcher = None
+        self.process_pool = None
+        
+        # Per-thread preprocessing buffers, reused across frames
+        self._buffers = threading.local()
         
-        # Caching
-        self.pattern_cache = {}
+        # Caching: LRU within hardware.cache_size_mb, kept across sessions if a path is set
         self.cache_size_mb = config.get('hardware', {}).get('cache_size_mb', 512)
+        self.pattern_cache = PatternCache(
+            self.cache_size_mb * 1024 * 1024,
+            path=config.get('ml', {}).get('pattern_cache_path') or None
+        )
+        self.pattern_cache.load()
         
         # Statistics
         self.inference_times = []
         self.predictions_count = 0
+    
+    def weights_path(self) -> str:
+        """Configured weights file of the selected model type"""
+        if self.model_type == 'lane_crop':
+            return self.config.get('ml', {}).get('lane_model_path', 'models/lane_detector.pth')
+        return self.config.get('ml', {}).get('model_path', 'models/note_detector.pth')
+    
+    def _create_model(self) -> nn.Module:
+        """Untrained fp32 model of the selected type"""
+        if self.model_type == 'lane_crop':
+            return LaneCropModel(num_lanes=self.num_lanes)
+        return NoteDetectorModel(num_lanes=self.num_lanes)
+    
+    def _lane_crop_band(self) -> Tuple[float, float]:
+        """Top and bottom of the lane crops as fractions of the detection frame"""
+        capture = self.config.get('capture', {})
+        if capture.get('roi_mode', 'full') != 'full':
+            return (0.0, 1.0)  # ROI frames already are the band around the hit line
         
+        hit_line = capture.get('hit_line', 0.85)
+        return (max(0.0, hit_line - capture.get('lookahead', 0.2)),
+                min(1.0, hit_line + capture.get('hit_margin', 0.05)))
+    
     def load_model(self, model_path: Optional[str] = None) -> bool:
         """Load or initialize the model"""
         try:
             if model_path is None:
-                model_path = self.config.get('ml', {}).get('model_path', 'models/note_detector.pth')
+                model_path = self.weights_path()
             
             # Initialize model
-            self.model = NoteDetectorModel(num_lanes=self.num_lanes)
+            self.model = self._create_model()
             
             # Load weights if file exists
             if os.path.exists(model_path):
@@ -90,17 +457,67 @@ class MLEngine:
             self.model.to(self.device)
             self.model.eval()
             
+            self.quantized = None
+            self.compiled = False
+            self.backend = None
+            self.memory_format = torch.contiguous_format
+            threads = self.config.get('hardware', {}).get('cpu_threads', 2)
+            
+            # ONNX Runtime runs its own fp32 graph; torch quantization does not apply
+            if self.backend_name == 'onnxruntime':
+                self.backend = self._load_onnxruntime(self.model, model_path, threads)
+            
+            if self.backend is None and self.channels_last:
+                self.memory_format = torch.channels_last
+                self.model = self.model.to(memory_format=self.memory_format)
+            
             # Apply quantization for CPU optimization
-            if self.use_quantization:
+            if (self.backend is None and self.use_quantization and self.quantization_mode == 'static'
+                    and self.model_type == 'lane_crop'):
+                print("Statik quantization yalnızca tam kare modelinde var, dinamik kullanılıyor")
+            elif self.backend is None and self.use_quantization and self.quantization_mode == 'static':
+                ml_config = self.config.get('ml', {})
+                calibration = load_calibration_frames(
+                    ml_config.get('calibration_dir', 'recordings'),
+                    ml_config.get('calibration_frames', 200)
+                )
+                if calibration:
+                    self.model = self.quantize_static(self.model, calibration)
+                    print(f"Statik INT8 quantization uygulandı ({len(calibration)} kalibrasyon karesi)")
+                else:
+                    print("Kalibrasyon karesi bulunamadı, dinamik quantization kullanılıyor")
+            
+            if self.backend is None and self.use_quantization and self.quantized is None:
+                # Dynamic quantization only covers nn.Linear; convolutions stay fp32
                 self.model = torch.quantization.quantize_dynamic(
-                    self.model, {nn.Linear, nn.Conv2d}, dtype=torch.qint8
+                    self.model, {nn.Linear}, dtype=torch.qint8
                 )
+                self.quantized = 'dynamic'
                 print("Model quantization uygulandı (CPU optimizasyonu)")
             
+            # Frozen TorchScript graph instead of the eager module call path
+            if self.backend is None and self.backend_name == 'torchscript':
+                self.model = self._compile_torchscript(self.model, model_path)
+                self.compiled = True
+                self.backend = TorchScriptBackend(self.model)
+            elif self.backend is None:
+                self.backend = EagerBackend(self.model)
+            
             # Set thread count for CPU optimization
-            torch.set_num_threads(self.config.get('hardware', {}).get('cpu_threads', 2))
+            torch.set_num_threads(threads)
             
+            self.detection_threshold = self.config.get('game', {}).get('accuracy_threshold', 0.95)
             self.model_loaded = True
+            
+            # Gather frames from concurrent callers into shared forward passes
+            if self.config.get('ml', {}).get('micro_batching', False):
+                self.enable_micro_batching()
+            
+            # Worker processes reload the weights, so restart them with the model
+            if self.config.get('ml', {}).get('inference_processes', 0) > 0:
+                self.disable_process_pool()
+                self.enable_process_pool()
+            
             return True
             
         except Exception as e:
@@ -108,10 +525,224 @@ class MLEngine:
             self.model_loaded = False
             return False
     
+    def quantize_static(self, model: nn.Module, calibration_frames: List[np.ndarray]) -> nn.Module:
+        """Fully INT8 copy of an fp32 model, with activation ranges observed on frames"""
+        quantizable = QuantizableNoteDetectorModel(num_lanes=self.num_lanes)
+        quantizable.load_state_dict(model.state_dict())
+        quantizable.eval()
+        quantizable.fuse()
+        
+        quantizable.qconfig = torch.ao.quantization.get_default_qconfig(
+            torch.backends.quantized.engine
+        )
+        torch.ao.quantization.prepare(quantizable, inplace=True)
+        
+        # Calibration: run the frames through the observers
+        with torch.no_grad():
+            for first in range(0, len(calibration_frames), self.batch_size):
+                chunk = calibration_frames[first:first + self.batch_size]
+                input_tensor = self._input_buffer(len(chunk))
+                for i, frame in enumerate(chunk):
+                    self._preprocess_into(frame, i)
+                quantizable(input_tensor)
+        
+        torch.ao.quantization.convert(quantizable, inplace=True)
+        self.quantized = 'static'
+        return quantizable
+    
+    def _torchscript_cache_path(self, model_path: str) -> Optional[str]:
+        """Compiled graph file next to the weights, keyed by their hash and torch version"""
+        if not os.path.exists(model_path):
+            return None  # freshly initialized weights change on every start
+        if self.quantized == 'static':
+            return None  # the graph also depends on the calibration frames
+        
+        variant = 'int8' if self.quantized else 'fp32'
+        if self.memory_format == torch.channels_last:
+            variant += '-cl'
+        base = os.path.splitext(model_path)[0]
+        return f"{base}.{file_digest(model_path)}.torch-{torch.__version__}.{variant}.ts"
+    
+    def _compile_torchscript(self, model: nn.Module, model_path: str) -> torch.jit.ScriptModule:
+        """Trace and freeze the model, or load the cached frozen graph"""
+        cache_path = self._torchscript_cache_path(model_path)
+        frozen = None
+        
+        if cache_path and os.path.exists(cache_path):
+            try:
+                frozen = torch.jit.load(cache_path, map_location=self.device)
+                print(f"TorchScript modeli önbellekten yüklendi: {cache_path}")
+            except Exception as e:
+                print(f"TorchScript önbelleği okunamadı, yeniden derleniyor: {e}")
+        
+        if frozen is None:
+            example = torch.zeros((1,) + self.input_shape, device=self.device)
+            example = example.contiguous(memory_format=self.memory_format)
+            with torch.no_grad():
+                frozen = torch.jit.freeze(torch.jit.trace(model, example))
+            if cache_path:
+                torch.jit.save(frozen, cache_path)
+                print(f"TorchScript modeli önbelleğe yazıldı: {cache_path}")
+        
+        # optimize_for_inference rewrites the graph into a form that cannot
+        # be saved, so it is applied on every load (it only takes milliseconds)
+        return torch.jit.optimize_for_inference(frozen)
+    
+    def _onnx_path(self, model_path: str) -> str:
+        """note_detector.onnx next to the weights"""
+        return os.path.splitext(model_path)[0] + '.onnx'
+    
+    def _onnx_cache_path(self, model_path: str) -> Optional[str]:
+        """Exported graph file next to the weights, keyed by their hash, model type and input shape"""
+        if not os.path.exists(model_path):
+            return None  # freshly initialized weights change on every start
+        
+        shape = 'x'.join(str(size) for size in self.input_shape)
+        base = os.path.splitext(model_path)[0]
+        return f"{base}.{file_digest(model_path)}.{self.model_type}-{shape}.onnx"
+    
+    def _load_onnxruntime(self, model: nn.Module, model_path: str,
+                          threads: int) -> Optional[InferenceBackend]:
+        """ONNX Runtime backend over the cached graph of these weights
+        
+        The graph is exported when no cached file matches the weights;
+        initialized weights are exported to a temporary file that is not
+        kept. None (and PyTorch inference) if onnxruntime is not installed
+        or the export fails.
+        """
+        cache_path = self._onnx_cache_path(model_path)
+        try:
+            import onnxruntime  # noqa: F401 (fail before spending time on the export)
+            
+            if cache_path is None:
+                # The session holds the graph in memory once created
+                with tempfile.TemporaryDirectory() as directory:
+                    onnx_path = os.path.join(directory, 'model.onnx')
+                    export_onnx(model, onnx_path, self.input_shape)
+                    backend = OnnxRuntimeBackend(onnx_path, threads)
+                print("ONNX Runtime arka ucu kullanılıyor (kaydedilmemiş ağırlıklar)")
+                return backend
+            
+            if not os.path.exists(cache_path):
+                # Export beside it and rename, so a failed export leaves no cache file
+                partial = f"{cache_path}.{os.getpid()}.tmp"
+                export_onnx(model, partial, self.input_shape)
+                os.replace(partial, cache_path)
+                print(f"ONNX modeli dışa aktarıldı: {cache_path}")
+            
+            backend = OnnxRuntimeBackend(cache_path, threads)
+            print(f"ONNX Runtime arka ucu kullanılıyor: {cache_path}")
+            return backend
+        except ImportError as e:
+            print(f"onnxruntime kurulu değil, PyTorch kullanılıyor: {e}")
+        except Exception as e:
+            print(f"ONNX Runtime başlatılamadı, PyTorch kullanılıyor: {e}")
+        return None
+    
+    def export_onnx(self, path: Optional[str] = None) -> Optional[str]:
+        """Export the fp32 weights of the selected model type to ONNX
+        
+        Defaults to note_detector.onnx (lane_detector.onnx for lane crops)
+        next to the weights.
+        """
+        model_path = self.weights_path()
+        path = path or self._onnx_path(model_path)
+        try:
+            model = self._create_model()
+            if os.path.exists(model_path):
+                model.load_state_dict(torch.load(model_path, map_location='cpu'))
+            else:
+                print(f"Model dosyası bulunamadı, başlangıç ağırlıkları aktarılıyor: {model_path}")
+            model.eval()
+            
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            export_onnx(model, path, self.input_shape)
+            print(f"ONNX modeli dışa aktarıldı: {path}")
+            return path
+        except Exception as e:
+            print(f"ONNX dışa aktarma hatası: {e}")
+            return None
+    
+    def train(self, samples: List[Tuple[np.ndarray, List[Dict]]], epochs: int = 10,
+              learning_rate: float = 1e-3, model_path: Optional[str] = None) -> List[float]:
+        """Fit the fp32 weights of the selected model type on labelled frames
+        
+        Each sample pairs a frame with its notes ({'lane', 'position'},
+        positions as fractions of the frame height); lanes without a note
+        are negatives. The weights are saved to the model path and the
+        mean loss of every epoch is returned. Call load_model() afterwards
+        to rebuild the inference backend from them.
+        """
+        model_path = model_path or self.weights_path()
+        model = self._create_model()
+        if os.path.exists(model_path):
+            model.load_state_dict(torch.load(model_path, map_location='cpu'))
+        
+        # Targets in model coordinates: lane crops only see their band
+        top, bottom = self.crop_band if self.model_type == 'lane_crop' else (0.0, 1.0)
+        inputs = torch.empty((len(samples),) + self.input_shape)
+        present = torch.zeros((len(samples), self.num_lanes))
+        positions = torch.zeros((len(samples), self.num_lanes))
+        buffer = self._input_buffer(1)
+        for i, (frame, notes) in enumerate(samples):
+            self._preprocess_into(frame, 0)
+            inputs[i] = buffer[0]
+            for note in notes:
+                lane, position = note['lane'], note['position']
+                if 0 <= lane < self.num_lanes and top <= position <= bottom:
+                    # Several notes in a lane: learn the one nearest the hit line
+                    present[i, lane] = 1.0
+                    positions[i, lane] = max(positions[i, lane], (position - top) / (bottom - top))
+        
+        optimizer = torch.optim.Adam(model.parameters(), lr=learning_rate)
+        confidence_loss = nn.BCEWithLogitsLoss()
+        losses = []
+        
+        model.train()
+        for epoch in range(epochs):
+            order = torch.randperm(len(samples))
+            total = 0.0
+            for first in range(0, len(samples), self.batch_size):
+                batch = order[first:first + self.batch_size]
+                output = model(inputs[batch])
+                
+                # Position only counts where there is a note to locate
+                mask = present[batch] > 0
+                loss = confidence_loss(output[..., 1], present[batch])
+                if mask.any():
+                    loss = loss + nn.functional.mse_loss(output[..., 0][mask], positions[batch][mask])
+                
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+                total += loss.item() * len(batch)
+            
+            losses.append(total / len(samples))
+            print(f"Eğitim turu {epoch + 1}/{epochs}: kayıp {losses[-1]:.4f}")
+        model.eval()
+        
+        os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+        torch.save(model.state_dict(), model_path)
+        print(f"Model kaydedildi: {model_path}")
+        return losses
+    
     def detect_notes(self, frame: np.ndarray) -> List[Dict]:
         """Detect notes in a frame"""
+        return detections_to_dicts(self.detect_notes_array(frame))
+    
+    def detect_notes_array(self, frame: np.ndarray) -> np.ndarray:
+        """Detect notes in a frame as a DETECTION_DTYPE record array"""
         if not self.model_loaded:
-            return []
+            return np.empty(0, dtype=DETECTION_DTYPE)
+        
+        if self.process_pool is not None and not self.process_pool.failed:
+            self.predictions_count += 1
+            return self.process_pool.submit(frame).result()
+        
+        if self.micro_batcher is not None:
+            return self.micro_batcher.submit(frame).result()
         
         try:
             start_time = time.time()
@@ -120,11 +751,10 @@ class MLEngine:
             input_tensor = self._preprocess_frame(frame)
             
             # Run inference
-            with torch.no_grad():
-                output = self.model(input_tensor)
+            output = self.backend.run(input_tensor)
             
             # Post-process output
-            detections = self._postprocess_output(output)
+            detections = self._postprocess_output(output)[0]
             
             # Record inference time
             inference_time = (time.time() - start_time) * 1000  # ms
@@ -138,7 +768,85 @@ class MLEngine:
             
         except Exception as e:
             print(f"Not algılama hatası: {e}")
-            return []
+            return np.empty(0, dtype=DETECTION_DTYPE)
+    
+    def detect_notes_batch(self, frames: List[np.ndarray]) -> List[List[Dict]]:
+        """Detect notes in several frames, batch_size frames per forward pass"""
+        return [detections_to_dicts(records) for records in self.detect_notes_batch_array(frames)]
+    
+    def detect_notes_batch_array(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        """detect_notes_batch returning one record array per frame"""
+        if not self.model_loaded:
+            return [np.empty(0, dtype=DETECTION_DTYPE) for _ in frames]
+        
+        results = []
+        for first in range(0, len(frames), self.batch_size):
+            chunk = frames[first:first + self.batch_size]
+            try:
+                start_time = time.time()
+                
+                input_tensor = self._input_buffer(len(chunk))
+                for i, frame in enumerate(chunk):
+                    self._preprocess_into(frame, i)
+                output = self.backend.run(input_tensor)
+                
+                results.extend(self._postprocess_output(output))
+                
+                # Record per-frame inference time so it compares with detect_notes
+                inference_time = (time.time() - start_time) * 1000 / len(chunk)
+                self.inference_times.append(inference_time)
+                if len(self.inference_times) > 100:
+                    self.inference_times.pop(0)
+                
+                self.predictions_count += len(chunk)
+                
+            except Exception as e:
+                print(f"Toplu not algılama hatası: {e}")
+                results.extend(np.empty(0, dtype=DETECTION_DTYPE) for _ in chunk)
+        
+        return results
+    
+    def enable_micro_batching(self, max_wait_ms: Optional[float] = None):
+        """Route detect_notes through a MicroBatcher"""
+        if self.micro_batcher is not None:
+            return
+        
+        if max_wait_ms is None:
+            max_wait_ms = self.config.get('ml', {}).get('micro_batch_wait_ms', 5)
+        self.micro_batcher = MicroBatcher(self, self.batch_size, max_wait_ms)
+        self.micro_batcher.start()
+    
+    def disable_micro_batching(self):
+        """Go back to one forward pass per detect_notes call"""
+        if self.micro_batcher is not None:
+            self.micro_batcher.stop()
+            self.micro_batcher = None
+    
+    def enable_process_pool(self, workers: Optional[int] = None) -> bool:
+        """Route detect_notes to an InferenceProcessPool (weights must be on disk)"""
+        if self.process_pool is not None:
+            return True
+        
+        from inference_pool import InferenceProcessPool
+        
+        # Every worker must load the same weights as this process
+        if not os.path.exists(self.weights_path()):
+            print(f"Çıkarım işlemleri için model dosyası gerekli: {self.weights_path()}")
+            return False
+        
+        if workers is None:
+            workers = self.config.get('ml', {}).get('inference_processes', 2)
+        pool = InferenceProcessPool(self.config, workers=workers)
+        if not pool.start():
+            return False
+        self.process_pool = pool
+        return True
+    
+    def disable_process_pool(self):
+        """Go back to detecting in this process"""
+        if self.process_pool is not None:
+            self.process_pool.stop()
+            self.process_pool = None
     
     def recognize_pattern(self, note_sequence: List[Dict]) -> Dict:
         """Recognize pattern in note sequence"""
@@ -147,8 +855,9 @@ class MLEngine:
             pattern_sig = self._create_pattern_signature(note_sequence)
             
             # Check cache
-            if pattern_sig in self.pattern_cache:
-                return self.pattern_cache[pattern_sig]
+            cached = self.pattern_cache.get(pattern_sig)
+            if cached is not None:
+                return cached
             
             # Analyze pattern
             pattern_info = {
@@ -159,7 +868,7 @@ class MLEngine:
             }
             
             # Cache result
-            self.pattern_cache[pattern_sig] = pattern_info
+            self.pattern_cache.put(pattern_sig, pattern_info)
             
             return pattern_info
             
@@ -167,6 +876,10 @@ class MLEngine:
             print(f"Pattern tanıma hatası: {e}")
             return {'type': 'unknown', 'difficulty': 0, 'bpm': 0, 'density': 0}
     
+    def save_pattern_cache(self) -> bool:
+        """Write the pattern cache to ml.pattern_cache_path, if one is set"""
+        return self.pattern_cache.save()
+    
     def predict_difficulty(self, notes: List[Dict]) -> float:
         """Predict difficulty level (0-10)"""
         if not notes:
@@ -236,48 +949,108 @@ class MLEngine:
         """Get ML engine statistics"""
         avg_inference_time = (np.mean(self.inference_times) 
                             if self.inference_times else 0)
+        pool = self.process_pool.get_stats() if self.process_pool else None
+        cache = self.pattern_cache.get_stats()
+        if pool and pool['frames_processed']:
+            avg_inference_time = pool['avg_inference_ms']
         
         return {
             'model_loaded': self.model_loaded,
             'predictions_count': self.predictions_count,
             'avg_inference_ms': avg_inference_time,
-            'cache_size': len(self.pattern_cache),
-            'device': str(self.device)
+            'cache_size': cache['entries'],
+            'cache_bytes': cache['bytes'],
+            'cache_hits': cache['hits'],
+            'cache_misses': cache['misses'],
+            'cache_evictions': cache['evictions'],
+            'device': str(self.device),
+            'backend': self.backend.name if self.backend else 'none',
+            'compiled': self.compiled,
+            'channels_last': self.memory_format == torch.channels_last,
+            'quantization': self.quantized or 'none',
+            'avg_batch_size': self.micro_batcher.get_stats()['avg_batch_size'] if self.micro_batcher else 1.0,
+            'inference_processes': pool['workers'] if pool and not pool['failed'] else 0,
+            'avg_roundtrip_ms': pool['avg_roundtrip_ms'] if pool else 0.0
         }
     
     def _preprocess_frame(self, frame: np.ndarray) -> torch.Tensor:
         """Preprocess frame for model input"""
-        # Resize to model input size (32x32)
-        from PIL import Image
-        img = Image.fromarray(frame)
-        img = img.resize((32, 32))
-        
-        # Convert to tensor and normalize
-        img_array = np.array(img).astype(np.float32) / 255.0
-        tensor = torch.from_numpy(img_array).permute(2, 0, 1).unsqueeze(0)
+        tensor = self._input_buffer(1)
+        self._preprocess_into(frame, 0)
+        return tensor
+    
+    def _input_buffer(self, batch: int) -> torch.Tensor:
+        """Calling thread's (batch, *input_shape) float32 input tensor
         
-        return tensor.to(self.device)
+        The tensor is reused by the next call on the same thread, so it is
+        only valid until then.
+        """
+        buffers = self._buffers
+        if (getattr(buffers, 'input', None) is None or buffers.input.shape[0] < batch or
+                not buffers.input.is_contiguous(memory_format=self.memory_format)):
+            buffers.input = torch.empty((max(batch, self.batch_size),) + self.input_shape,
+                                        dtype=torch.float32, device=self.device,
+                                        memory_format=self.memory_format)
+            buffers.input_np = buffers.input.numpy()
+            buffers.sampled = None
+        return buffers.input[:batch]
     
-    def _postprocess_output(self, output: torch.Tensor) -> List[Dict]:
-        """Post-process model output to detections"""
-        detections = []
-        output_np = output.cpu().numpy()[0]  # Get first batch
+    def _preprocess_into(self, frame: np.ndarray, index: int):
+        """Resize a BGR/BGRA frame into slot index of the input buffer"""
+        buffers = self._buffers
+        channels = frame.shape[2]
         
-        threshold = self.config.get('game', {}).get('accuracy_threshold', 0.95)
+        if self.model_type == 'lane_crop':
+            # Only the band around the hit line: one resize to crop_width
+            # columns per lane makes every crop at once
+            height, width = frame.shape[:2]
+            lane_width = width // self.num_lanes
+            top, bottom = self.crop_band
+            frame = frame[round(height * top):round(height * bottom), :lane_width * self.num_lanes]
+        out_height, out_width = self.input_shape[1:]
         
-        for lane_idx in range(self.num_lanes):
-            position = output_np[lane_idx, 0]
-            confidence = torch.sigmoid(torch.tensor(output_np[lane_idx, 1])).item()
-            
-            if confidence > threshold:
-                detections.append({
-                    'lane': lane_idx,
-                    'position': float(position),
-                    'confidence': float(confidence),
-                    'time': time.time()
-                })
+        # The strided view is gathered as float32 in [0, 1], so the resize
+        # writes the input tensor itself; the alpha channel is never read
+        sampled = subsample(frame, (out_width, out_height))[:, :, :3]
+        target = buffers.input_np[index]  # (C, H, W) view of the tensor
+        
+        if self.memory_format == torch.channels_last:
+            # NHWC memory: one resize of all channels into the slot
+            if buffers.sampled is None or buffers.sampled.shape != sampled.shape:
+                buffers.sampled = np.empty(sampled.shape, dtype=np.float32)
+            np.multiply(sampled, np.float32(1.0 / 255.0), out=buffers.sampled, dtype=np.float32)
+            cv2.resize(buffers.sampled, (out_width, out_height), dst=target.transpose(1, 2, 0),
+                       interpolation=cv2.INTER_AREA)
+        else:
+            # NCHW memory: one resize per channel plane into the slot
+            planar_shape = (3,) + sampled.shape[:2]
+            if buffers.sampled is None or buffers.sampled.shape != planar_shape:
+                buffers.sampled = np.empty(planar_shape, dtype=np.float32)
+            np.multiply(sampled.transpose(2, 0, 1), np.float32(1.0 / 255.0), out=buffers.sampled,
+                        dtype=np.float32)
+            for channel in range(3):
+                cv2.resize(buffers.sampled[channel], (out_width, out_height), dst=target[channel],
+                           interpolation=cv2.INTER_AREA)
+    
+    def _postprocess_output(self, output: torch.Tensor) -> List[np.ndarray]:
+        """Post-process (batch, lanes, 2) model output to one record array per frame"""
+        # One sigmoid and one threshold mask over the whole batch
+        output_np = output.numpy()
+        confidence = torch.sigmoid(output[..., 1]).numpy()
+        frame_idx, lanes = np.nonzero(confidence > self.detection_threshold)
+        
+        records = np.empty(len(lanes), dtype=DETECTION_DTYPE)
+        records['lane'] = lanes
+        records['position'] = output_np[frame_idx, lanes, 0]
+        if self.model_type == 'lane_crop':
+            # Crop-relative positions back to fractions of the frame height
+            top, bottom = self.crop_band
+            records['position'] = top + records['position'] * (bottom - top)
+        records['confidence'] = confidence[frame_idx, lanes]
         
-        return detections
+        # np.nonzero is row-major, so each frame's detections are contiguous
+        counts = np.bincount(frame_idx, minlength=output_np.shape[0])
+        return np.split(records, np.cumsum(counts)[:-1])
     
     def _create_pattern_signature(self, note_sequence: List[Dict]) -> str:
         """Create a unique signature for a note pattern"""
@@ -329,6 +1102,19 @@ class MLEngine:
 
 
 if __name__ == "__main__":
+    import argparse
+    import sys
+    
+    parser = argparse.ArgumentParser(description="ML Engine testi ve ONNX dışa aktarma")
+    parser.add_argument('--export-onnx', nargs='?', const='', metavar='PATH',
+                        help="note_detector.onnx dosyasını yaz (varsayılan: model dosyasının yanına)")
+    args = parser.parse_args()
+    
+    if args.export_onnx is not None:
+        from config_manager import ConfigManager
+        engine = MLEngine(ConfigManager().config)
+        sys.exit(0 if engine.export_onnx(args.export_onnx or None) else 1)
+    
     # Test ML engine
     config = {
         'hardware': {'batch_size': 16, 'cpu_threads': 2, 'cache_size_mb': 512},
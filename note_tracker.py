@@ -0,0 +1,285 @@
+"""
+Note Tracker for Club M Star AutoInput System
+Follows notes across frames per lane and predicts when they cross the hit line
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class LaneTrack:
+    """Observed positions of one note moving down one lane"""
+    
+    def __init__(self, track_id: int, lane: int, history_size: int):
+        """Start an empty track"""
+        self.track_id = track_id
+        self.lane = lane
+        self.observations = deque(maxlen=history_size)  # (timestamp, position)
+        self.velocity = 0.0  # positions per second, positive = downwards
+        self.position = 0.0  # fitted position at the latest observation
+    
+    def add(self, timestamp: float, position: float):
+        """Add an observation and refit the motion"""
+        self.observations.append((timestamp, position))
+        self.velocity, self.position = self._fit()
+    
+    def _fit(self) -> Tuple[float, float]:
+        """Least-squares slope of position over time, and the line at the latest time"""
+        if len(self.observations) < 2:
+            return 0.0, self.last_position
+        
+        n = len(self.observations)
+        mean_t = sum(t for t, _ in self.observations) / n
+        mean_p = sum(p for _, p in self.observations) / n
+        var_t = sum((t - mean_t) ** 2 for t, _ in self.observations)
+        if var_t <= 0:
+            return 0.0, self.last_position
+        
+        cov = sum((t - mean_t) * (p - mean_p) for t, p in self.observations)
+        velocity = cov / var_t
+        return velocity, mean_p + velocity * (self.last_time - mean_t)
+    
+    @property
+    def last_time(self) -> float:
+        """Timestamp of the latest observation"""
+        return self.observations[-1][0]
+    
+    @property
+    def last_position(self) -> float:
+        """Position of the latest observation"""
+        return self.observations[-1][1]
+    
+    def predict_position(self, timestamp: float) -> float:
+        """Extrapolated position at timestamp"""
+        return self.position + self.velocity * (timestamp - self.last_time)
+
+
+class NoteTracker:
+    """Per-lane note tracker that predicts hit-line crossing times
+    
+    Positions are fractions of the detection frame height (0 = top,
+    1 = bottom) and timestamps come from time.perf_counter() at capture.
+    Until a note has been seen moving, its hit time falls back to the
+    detection time plus a fixed latency and it is not 'ready' to be
+    scheduled; a moving note is ready once it has min_observations
+    sightings, so one noisy pair cannot schedule it. Hit times are
+    extrapolated from the fitted line rather than the latest raw position.
+    Detections without a position (the brightness fallback) can never be
+    seen moving, so their fallback hit time is ready at once.
+    """
+    
+    def __init__(self, num_lanes: int = 9, hit_line: float = 0.85,
+                 fallback_latency_ms: float = 50.0, history_size: int = 5,
+                 match_tolerance: float = 0.15, max_gap_ms: float = 150.0,
+                 min_velocity: float = 0.05, min_observations: int = 3):
+        """Initialize tracker"""
+        self.num_lanes = num_lanes
+        self.hit_line = hit_line
+        self.fallback_latency = fallback_latency_ms / 1000.0
+        self.history_size = history_size
+        self.match_tolerance = match_tolerance
+        self.max_gap = max_gap_ms / 1000.0
+        self.min_velocity = min_velocity
+        self.min_observations = min_observations
+        
+        self.tracks: List[Optional[LaneTrack]] = [None] * num_lanes
+        self._next_id = 0
+        
+        # Statistics
+        self.tracks_started = 0
+        self.predictions = 0
+        self.fallback_predictions = 0
+    
+    def update(self, detections: List[Dict], timestamp: float) -> List[Dict]:
+        """Match detections to tracks and annotate them with predicted hit times
+        
+        Each returned detection is a copy carrying 'track_id', 'velocity',
+        'hit_time' (perf_counter seconds) and 'ready'.
+        """
+        results = []
+        
+        for detection in detections:
+            lane = detection['lane']
+            if not 0 <= lane < self.num_lanes:
+                continue
+            
+            position = float(detection.get('position', 0.0))
+            track = self._match(lane, position, timestamp)
+            track.add(timestamp, position)
+            
+            tracked = dict(detection)
+            tracked['track_id'] = track.track_id
+            tracked['velocity'] = track.velocity
+            tracked['hit_time'] = self._predict_hit_time(track, timestamp)
+            tracked['ready'] = ((track.velocity >= self.min_velocity and
+                                 len(track.observations) >= self.min_observations) or
+                                'position' not in detection)
+            results.append(tracked)
+        
+        self._expire(timestamp)
+        return results
+    
+    def _match(self, lane: int, position: float, timestamp: float) -> LaneTrack:
+        """Continue the lane's track if the detection fits it, else start a new one"""
+        track = self.tracks[lane]
+        
+        if track is not None and timestamp - track.last_time <= self.max_gap:
+            expected = track.predict_position(timestamp)
+            if abs(position - expected) <= self.match_tolerance:
+                return track
+        
+        track = LaneTrack(self._next_id, lane, self.history_size)
+        self._next_id += 1
+        self.tracks_started += 1
+        self.tracks[lane] = track
+        return track
+    
+    def _predict_hit_time(self, track: LaneTrack, timestamp: float) -> float:
+        """Time at which the track reaches the hit line"""
+        self.predictions += 1
+        
+        if track.velocity < self.min_velocity:
+            self.fallback_predictions += 1
+            return timestamp + self.fallback_latency
+        
+        remaining = self.hit_line - track.position
+        return track.last_time + max(0.0, remaining) / track.velocity
+    
+    def _expire(self, timestamp: float):
+        """Drop tracks that have not been seen recently"""
+        for lane, track in enumerate(self.tracks):
+            if track is not None and timestamp - track.last_time > self.max_gap:
+                self.tracks[lane] = None
+    
+    def reset(self):
+        """Forget all tracks"""
+        self.tracks = [None] * self.num_lanes
+    
+    def reset_stats(self):
+        """Reset tracker statistics"""
+        self.tracks_started = 0
+        self.predictions = 0
+        self.fallback_predictions = 0
+    
+    def get_stats(self) -> Dict:
+        """Get tracker statistics"""
+        return {
+            'tracks_started': self.tracks_started,
+            'active_tracks': sum(1 for track in self.tracks if track is not None),
+            'predictions': self.predictions,
+            'fallback_predictions': self.fallback_predictions
+        }
+
+
+class NoteDeduplicator:
+    """Lets each physical note through once, and again only to move its press
+    
+    A note's identity is its tracker track_id. A later sighting passes
+    again only while its scheduled press is still ahead of now and its
+    refined hit time has moved by more than tolerance_ms, so the caller
+    can move the pending press; otherwise it is dropped. Notes that are
+    not 'ready' never pass but keep their track known. A track is
+    forgotten window_ms after its latest hit time; ids are never reused,
+    so this only bounds memory.
+    """
+    
+    def __init__(self, window_ms: float = 40.0, tolerance_ms: float = 4.0):
+        """Initialize deduplicator"""
+        self.window = window_ms / 1000.0
+        self.tolerance = tolerance_ms / 1000.0
+        self.scheduled: Dict[int, float] = {}  # track_id -> scheduled hit time
+        self.latest: Dict[int, float] = {}  # track_id -> latest hit time
+        
+        # Statistics
+        self.notes_passed = 0
+        self.notes_rescheduled = 0
+        self.duplicates_suppressed = 0
+    
+    def filter(self, notes: List[Dict], now: float) -> List[Dict]:
+        """Drop notes whose scheduled press needs no change"""
+        self._expire(now)
+        fresh = []
+        
+        for note in notes:
+            track_id = note['track_id']
+            self.latest[track_id] = note['hit_time']
+            if not note.get('ready', True):
+                continue
+            
+            scheduled = self.scheduled.get(track_id)
+            if scheduled is None:
+                self.notes_passed += 1
+            elif scheduled > now and abs(note['hit_time'] - scheduled) > self.tolerance:
+                self.notes_rescheduled += 1
+            else:
+                self.duplicates_suppressed += 1
+                continue
+            self.scheduled[track_id] = note['hit_time']
+            fresh.append(note)
+        
+        return fresh
+    
+    def restore(self, track_id: int, hit_time: float):
+        """Record that a track's press stayed at hit_time (it could not be moved)"""
+        self.scheduled[track_id] = hit_time
+    
+    def _expire(self, now: float):
+        """Forget tracks whose hit time has passed by more than the window"""
+        expired = [track_id for track_id, hit_time in self.latest.items()
+                   if hit_time + self.window < now]
+        for track_id in expired:
+            self.scheduled.pop(track_id, None)
+            del self.latest[track_id]
+    
+    def reset(self):
+        """Forget all scheduled notes"""
+        self.scheduled = {}
+        self.latest = {}
+    
+    def reset_stats(self):
+        """Reset deduplication statistics"""
+        self.notes_passed = 0
+        self.notes_rescheduled = 0
+        self.duplicates_suppressed = 0
+    
+    def get_stats(self) -> Dict:
+        """Get deduplication statistics"""
+        return {
+            'notes_passed': self.notes_passed,
+            'notes_rescheduled': self.notes_rescheduled,
+            'duplicates_suppressed': self.duplicates_suppressed
+        }
+
+
+def group_chords(notes: List[Dict], window_ms: float = 10.0) -> List[Dict]:
+    """Group tracked notes whose hit times fall in the same window into chords
+    
+    Each chord is {'hit_time', 'lanes', 'notes'}; hit_time is the
+    earliest hit time in the group and is shared by every key in it.
+    """
+    chords = []
+    window = window_ms / 1000.0
+    
+    for note in sorted(notes, key=lambda note: note['hit_time']):
+        if chords and note['hit_time'] - chords[-1]['hit_time'] <= window:
+            chord = chords[-1]
+            if note['lane'] not in chord['lanes']:
+                chord['lanes'].append(note['lane'])
+            chord['notes'].append(note)
+        else:
+            chords.append({'hit_time': note['hit_time'], 'lanes': [note['lane']],
+                           'notes': [note]})
+    
+    return chords
+
+
+if __name__ == "__main__":
+    # Test note tracker with a note scrolling at 1 frame height per second
+    tracker = NoteTracker(num_lanes=9, hit_line=0.85)
+    
+    for frame in range(5):
+        timestamp = frame / 60.0
+        notes = tracker.update([{'lane': 3, 'position': 0.2 + timestamp}], timestamp)
+    
+    print(f"Tahmini vuruş zamanı: {notes[0]['hit_time']:.3f} s (beklenen 0.650 s)")
+    print("Takip istatistikleri:", tracker.get_stats())
@@ -0,0 +1,164 @@
+"""
+Pattern Cache for Club M Star AutoInput System
+Byte-budgeted LRU cache for recognized note patterns, optionally kept on disk
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Rough per-entry cost of the OrderedDict itself (hash slot + linked-list node)
+ENTRY_OVERHEAD = 100
+
+
+def entry_size(key: str, value: Dict) -> int:
+    """Approximate bytes held by one cached pattern"""
+    size = ENTRY_OVERHEAD + sys.getsizeof(key) + sys.getsizeof(value)
+    for field, item in value.items():
+        size += sys.getsizeof(field) + sys.getsizeof(item)
+    return size
+
+
+class PatternCache:
+    """Least-recently-used cache whose entries fit in max_bytes
+    
+    Every put() charges the entry's approximate size and evicts from the
+    least recently used end until the total fits the budget again; an
+    entry larger than the whole budget is not cached. Sizes come from
+    sys.getsizeof, so the budget bounds the cache's own memory, not the
+    process RSS. With a path the contents can be saved as JSON and
+    loaded in the next session, oldest entry first so the recency order
+    survives.
+    """
+    
+    def __init__(self, max_bytes: int, path: Optional[str] = None):
+        """Initialize cache"""
+        self.max_bytes = max(0, int(max_bytes))
+        self.path = path
+        
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self.bytes_used = 0
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached value (now the most recently used), or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: str, value: Dict):
+        """Cache a value, evicting least recently used entries to make room"""
+        size = entry_size(key, value)
+        with self._lock:
+            if key in self._entries:
+                self.bytes_used -= self._sizes.pop(key)
+                del self._entries[key]
+            if size > self.max_bytes:
+                return
+            
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.bytes_used += size
+            while self.bytes_used > self.max_bytes:
+                oldest, _ = self._entries.popitem(last=False)
+                self.bytes_used -= self._sizes.pop(oldest)
+                self.evictions += 1
+    
+    def __contains__(self, key: str) -> bool:
+        """Membership test that does not count as a use"""
+        with self._lock:
+            return key in self._entries
+    
+    def __len__(self) -> int:
+        """Number of cached patterns"""
+        with self._lock:
+            return len(self._entries)
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.bytes_used = 0
+    
+    def save(self, path: Optional[str] = None) -> bool:
+        """Write the entries to JSON, least recently used first"""
+        path = path or self.path
+        if not path:
+            return False
+        
+        with self._lock:
+            entries = list(self._entries.items())
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'entries': entries}, f, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"Desen önbelleği kaydedilemedi: {e}")
+            return False
+    
+    def load(self, path: Optional[str] = None) -> int:
+        """Add the entries of a saved cache; returns how many were read"""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)['entries']
+        except Exception as e:
+            print(f"Desen önbelleği yüklenemedi: {e}")
+            return 0
+        
+        for key, value in entries:
+            self.put(key, value)
+        return len(entries)
+    
+    def reset_stats(self):
+        """Reset hit/miss/eviction counters"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'bytes': self.bytes_used,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+
+if __name__ == "__main__":
+    # Test cache with a budget of about ten patterns
+    pattern = {'type': 'mixed', 'difficulty': 3.5, 'bpm': 150.0, 'density': 10}
+    cache = PatternCache(max_bytes=10 * entry_size('0-1-2-3-4-5-6-7-8-0', pattern))
+    
+    for i in range(25):
+        cache.put(f"{i}-1-2-3-4-5-6-7-8-0", dict(pattern))
+        cache.get("0-1-2-3-4-5-6-7-8-0")  # the first pattern stays in use
+    
+    print("İlk desen önbellekte:", "0-1-2-3-4-5-6-7-8-0" in cache)
+    print("Önbellek istatistikleri:", cache.get_stats())
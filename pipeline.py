@@ -0,0 +1,265 @@
+"""
+Pipeline for Club M Star AutoInput System
+Worker stages connected by bounded queues, with per-stage metrics
+"""
+
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+
+
+class BoundedQueue:
+    """FIFO with a fixed capacity and a policy for when it is full
+    
+    drop_oldest discards the oldest queued item to make room (fresh data
+    matters more than complete data, e.g. frames); block makes the
+    producer wait for space, pushing back on the stage before it.
+    """
+    
+    def __init__(self, maxsize: int = 1, policy: str = DROP_OLDEST):
+        """Initialize queue"""
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Bilinmeyen kuyruk politikası: {policy}")
+        
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self._items = deque()
+        self._condition = threading.Condition()
+        
+        # Statistics
+        self.puts = 0
+        self.drops = 0
+    
+    def put(self, item, timeout: Optional[float] = None) -> bool:
+        """Queue an item; False if a blocking put timed out"""
+        with self._condition:
+            if len(self._items) >= self.maxsize:
+                if self.policy == DROP_OLDEST:
+                    self._items.popleft()
+                    self.drops += 1
+                elif not self._condition.wait_for(
+                        lambda: len(self._items) < self.maxsize, timeout):
+                    return False
+            
+            self._items.append(item)
+            self.puts += 1
+            self._condition.notify_all()
+            return True
+    
+    def get(self, timeout: Optional[float] = None, holder: Optional[Dict] = None, key=None):
+        """Take the oldest item, or None if nothing arrives within timeout
+        
+        With a holder the item is stored as holder[key] before the lock is
+        released, so a reader of items() then the holder always sees it.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._items, timeout):
+                return None
+            item = self._items.popleft()
+            if holder is not None:
+                holder[key] = item
+            self._condition.notify_all()
+            return item
+    
+    def items(self) -> List:
+        """Snapshot of the queued items"""
+        with self._condition:
+            return list(self._items)
+    
+    def depth(self) -> int:
+        """Number of queued items"""
+        with self._condition:
+            return len(self._items)
+    
+    def clear(self):
+        """Drop all queued items"""
+        with self._condition:
+            self._items.clear()
+            self._condition.notify_all()
+    
+    def reset_stats(self):
+        """Reset queue statistics"""
+        with self._condition:
+            self.puts = 0
+            self.drops = 0
+
+
+class PipelineStage:
+    """Runs func on items from an inbox on one or more worker threads
+    
+    func returns the item for the outbox, or None to pass nothing on. A
+    stage without an inbox is a source and calls func(None) in a loop.
+    Functions that keep state across items must run with workers=1.
+    """
+    
+    def __init__(self, name: str, func: Callable, inbox: Optional[BoundedQueue] = None,
+                 outbox: Optional[BoundedQueue] = None, workers: int = 1,
+                 on_exit: Optional[Callable] = None, history_size: int = 100):
+        """Initialize stage"""
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = max(1, workers)
+        self.on_exit = on_exit  # called on each worker thread as it stops
+        
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        self._in_flight: Dict[int, object] = {}
+        
+        # Statistics
+        self.service_times = deque(maxlen=history_size)
+        self.items_processed = 0
+        self.errors = 0
+    
+    def start(self):
+        """Start worker threads"""
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self, timeout: float = 2.0):
+        """Stop worker threads"""
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+    
+    def in_flight(self) -> List:
+        """Items the workers are processing right now"""
+        return list(self._in_flight.values())
+    
+    def pending(self) -> List:
+        """Items queued for or being processed by this stage
+        
+        The inbox is read first: an item taken in between is registered in
+        flight under the inbox lock, so it appears in one list or both. An
+        item stays in flight until its result is in the outbox.
+        """
+        queued = self.inbox.items() if self.inbox is not None else []
+        return queued + self.in_flight()
+    
+    def _work(self):
+        """Worker loop"""
+        worker = threading.get_ident()
+        try:
+            while self._running:
+                item = None
+                if self.inbox is not None:
+                    item = self.inbox.get(timeout=0.1, holder=self._in_flight, key=worker)
+                    if item is None:
+                        continue
+                
+                try:
+                    start_time = time.perf_counter()
+                    result = self.func(item)
+                    self.service_times.append((time.perf_counter() - start_time) * 1000)
+                    self.items_processed += 1
+                except Exception as e:
+                    self._in_flight.pop(worker, None)
+                    self.errors += 1
+                    print(f"Pipeline aşaması hatası ({self.name}): {e}")
+                    time.sleep(0.1)
+                    continue
+                
+                if result is not None and self.outbox is not None:
+                    while self._running and not self.outbox.put(result, timeout=0.1):
+                        pass
+                self._in_flight.pop(worker, None)
+        finally:
+            if self.on_exit:
+                self.on_exit()
+    
+    def reset_stats(self):
+        """Reset stage statistics"""
+        self.service_times.clear()
+        self.items_processed = 0
+        self.errors = 0
+        if self.inbox is not None:
+            self.inbox.reset_stats()
+    
+    def get_stats(self) -> Dict:
+        """Get stage statistics"""
+        times = list(self.service_times)
+        return {
+            'workers': self.workers,
+            'queue_depth': self.inbox.depth() if self.inbox is not None else 0,
+            'queue_drops': self.inbox.drops if self.inbox is not None else 0,
+            'items_processed': self.items_processed,
+            'errors': self.errors,
+            'avg_service_ms': float(np.mean(times)) if times else 0.0,
+            'p99_service_ms': float(np.percentile(times, 99)) if times else 0.0
+        }
+
+
+class Pipeline:
+    """Ordered set of stages started and stopped together"""
+    
+    def __init__(self, stages: List[PipelineStage]):
+        """Initialize pipeline"""
+        self.stages = {stage.name: stage for stage in stages}
+    
+    def start(self):
+        """Start every stage, sinks first so nothing backs up at startup"""
+        for stage in reversed(list(self.stages.values())):
+            stage.start()
+    
+    def stop(self, timeout: float = 2.0):
+        """Stop every stage, sources first, then clear the queues"""
+        for stage in self.stages.values():
+            stage.stop(timeout)
+            if stage.inbox is not None:
+                stage.inbox.clear()
+    
+    def bottleneck(self) -> Optional[str]:
+        """Stage with the highest per-worker service time"""
+        load = {name: stage.get_stats()['avg_service_ms'] / stage.workers
+                for name, stage in self.stages.items() if stage.service_times}
+        return max(load, key=load.get) if load else None
+    
+    def reset_stats(self):
+        """Reset statistics of every stage"""
+        for stage in self.stages.values():
+            stage.reset_stats()
+    
+    def get_stats(self) -> Dict:
+        """Get per-stage statistics"""
+        return {name: stage.get_stats() for name, stage in self.stages.items()}
+
+
+if __name__ == "__main__":
+    # Test a three-stage pipeline with a deliberately slow middle stage
+    counter = iter(range(1000000))
+    frames = BoundedQueue(maxsize=2, policy=DROP_OLDEST)
+    results = BoundedQueue(maxsize=4, policy=BLOCK)
+    
+    def produce(_):
+        time.sleep(0.001)
+        return next(counter)
+    
+    def slow_square(value):
+        time.sleep(0.005)
+        return value * value
+    
+    pipeline = Pipeline([
+        PipelineStage('produce', produce, outbox=frames),
+        PipelineStage('square', slow_square, inbox=frames, outbox=results),
+        PipelineStage('consume', lambda value: None, inbox=results)
+    ])
+    pipeline.start()
+    time.sleep(0.5)
+    pipeline.stop()
+    
+    for name, stats in pipeline.get_stats().items():
+        print(f"{name:<8} {stats}")
+    print("Darboğaz:", pipeline.bottleneck())
@@ -0,0 +1,73 @@
+"""
+Precision Timer for Club M Star AutoInput System
+Hybrid sleep/spin waits that hit perf_counter deadlines below sleep granularity
+"""
+
+import time
+from typing import Dict
+
+
+class PrecisionTimer:
+    """Sleeps coarsely until close to a deadline, then spins on perf_counter_ns
+    
+    spin_threshold_ms is the CPU budget of one wait: the timer never spins
+    for longer than that, and 0 turns it into a plain sleep. Deadlines are
+    time.perf_counter() seconds, like every other timestamp in the input path.
+    """
+    
+    def __init__(self, spin_threshold_ms: float = 1.5):
+        """Initialize timer"""
+        self.spin_ns = int(spin_threshold_ms * 1_000_000)
+        
+        # Statistics
+        self.waits = 0
+        self.spin_ns_total = 0
+    
+    def wait_until(self, deadline: float):
+        """Block until time.perf_counter() reaches deadline"""
+        deadline_ns = int(deadline * 1_000_000_000)
+        self.waits += 1
+        
+        remaining = deadline_ns - time.perf_counter_ns()
+        if remaining > self.spin_ns:
+            time.sleep((remaining - self.spin_ns) / 1_000_000_000)
+        
+        # Spin out the rest (or whatever the sleep overshot into)
+        spin_start = time.perf_counter_ns()
+        now = spin_start
+        while now < deadline_ns:
+            now = time.perf_counter_ns()
+        self.spin_ns_total += now - spin_start
+    
+    def wait(self, seconds: float):
+        """Block for a duration"""
+        self.wait_until(time.perf_counter() + seconds)
+    
+    def reset_stats(self):
+        """Reset spin statistics"""
+        self.waits = 0
+        self.spin_ns_total = 0
+    
+    def get_stats(self) -> Dict:
+        """Get spin statistics"""
+        return {
+            'waits': self.waits,
+            'spin_threshold_ms': self.spin_ns / 1_000_000,
+            'avg_spin_ms': self.spin_ns_total / self.waits / 1_000_000 if self.waits else 0.0
+        }
+
+
+if __name__ == "__main__":
+    # Test precision timer against plain sleep
+    timer = PrecisionTimer(spin_threshold_ms=1.5)
+    
+    for name, wait in (('sleep', time.sleep), ('precision', timer.wait)):
+        lateness = []
+        for _ in range(50):
+            target = time.perf_counter() + 0.002
+            wait(0.002)
+            lateness.append((time.perf_counter() - target) * 1000)
+        print(f"{name:<10} ortalama gecikme {sum(lateness) / len(lateness):.3f} ms, "
+              f"en fazla {max(lateness):.3f} ms")
+    
+    print("Zamanlayıcı istatistikleri:", timer.get_stats())